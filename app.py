@@ -4,10 +4,15 @@ Starten: streamlit run app.py
 """
 from __future__ import annotations
 
+import hashlib
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple
 from datetime import date, datetime, time as dt_time
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import streamlit as st
 import streamlit.components.v1 as components
 
@@ -16,6 +21,7 @@ from src.io_excel import (
     load_einsender_excel,
     build_nodes_mandatory_both_windows,
     depot_union_windows,
+    node_tw_array,
 )
 from src.matrix import build_matrices
 from src.solver import solve_vrptw, solve_vrptw_relaxed_soft_timewindows, fmt_min_to_hhmm
@@ -32,6 +38,145 @@ from src.debug_checks import (
 
 warnings.filterwarnings("ignore", category=UserWarning, module="openpyxl")
 
+
+@st.cache_data(show_spinner=False)
+def _cached_build_matrices(coords_tuple: tuple[tuple[float, float], ...]):
+    """Matrix je Koordinatensatz nur einmal berechnen – erneute Läufe mit gleicher Datei treffen den Cache."""
+    return build_matrices(list(coords_tuple))
+
+
+@st.cache_data(show_spinner=False)
+def _cached_solve(depot_tuple: tuple, cfg_tuple: tuple, time_matrix_min, node_tws, service_mins,
+                  initial_routes: tuple | None = None):
+    """Harte Lösung je Eingabe nur einmal rechnen – z.B. bei Änderung nur der Kostensätze."""
+    return solve_vrptw(DepotConfig(*depot_tuple), SolveConfig(*cfg_tuple), time_matrix_min, node_tws, service_mins,
+                       initial_routes=initial_routes)
+
+
+@st.cache_resource
+def _export_executor() -> ThreadPoolExecutor:
+    """Gemeinsamer Thread-Pool für die Exporte (Excel, Karte) über alle Läufe."""
+    return ThreadPoolExecutor(max_workers=2)
+
+
+
+def _compute_solution(uploaded, depot: DepotConfig, solve_cfg: SolveConfig, initial_routes=None) -> dict:
+    """
+    Schritte 1–4 (Laden, Matrix, Prechecks, Optimierung) plus Start der Exporte.
+    `initial_routes`: Node-Routen eines vorherigen Laufs derselben Datei als Warmstart.
+    Das Ergebnis wird in st.session_state abgelegt, damit Widget-Reruns
+    (Kostensätze, Tabs, Expander) nur noch die Anzeige neu aufbauen.
+    """
+    # ── Schritt 1: Daten laden ──────────────────────────────────────
+    with st.spinner("Lade Eingabedaten …"):
+        try:
+            df = load_einsender_excel(uploaded, solve_cfg)
+            coords, node_tws, service_mins, labels, node_senders, node_addresses, node_meta_df = (
+                build_nodes_mandatory_both_windows(depot, df, solve_cfg)
+            )
+        except Exception as e:
+            st.error(f"Fehler beim Laden der Datei: {e}")
+            st.stop()
+
+    if len(coords) <= 1:
+        st.error("Keine Abholfenster im Input gefunden – prüfe 'Abholung 1 von/bis'.")
+        st.stop()
+
+    # Einmalig als zusammenhängende Arrays für Matrix-Key und vektorisierte Prechecks
+    coords_arr = np.ascontiguousarray(coords, dtype=np.float64)
+    tws_arr    = node_tw_array(node_tws)
+    svc_arr    = np.asarray(service_mins, dtype=np.int32)
+
+    # ── Schritt 2: Matrix + Prechecks ohne Matrix (parallel) ───────
+    depot_windows = depot_union_windows(depot, solve_cfg)
+
+    with st.spinner("Berechne Fahrzeit-Matrix (OSRM) …"):
+        coords_tuple = tuple((round(lat, 6), round(lon, 6)) for lat, lon in coords_arr.tolist())
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            # OSRM ist netzwerkgebunden – die reinen Input-Checks laufen währenddessen
+            fut_matrix = executor.submit(_cached_build_matrices, coords_tuple)
+
+            stats = summarize_input(df, node_meta_df)
+            input_problems = check_depot_union(depot_windows) + check_basic_nodes(node_tws, labels)
+
+            try:
+                time_matrix_min, dist_matrix_m = fut_matrix.result()
+            except Exception as e:
+                st.error(f"Fehler bei Matrix-Berechnung: {e}")
+                st.stop()
+
+    # ── Schritt 3: Prechecks ────────────────────────────────────────
+    problems = (
+        input_problems
+        + check_matrix_sanity(time_matrix_min)
+        + check_reachability_quick(tws_arr, svc_arr, time_matrix_min, depot_windows, labels)
+    )
+
+    # ── Schritt 4: Optimieren ───────────────────────────────────────
+    violations  = None
+    node_routes = None
+    with st.spinner("Optimiere Routen …"):
+        try:
+            result = _cached_solve(astuple(depot), astuple(solve_cfg), time_matrix_min, node_tws, service_mins,
+                                   initial_routes)
+            routes      = result["routes"]
+            node_routes = result["node_routes"]
+
+        except RuntimeError as exc:
+            if str(exc) != "INFEASIBLE":
+                st.exception(exc)
+                st.stop()
+
+            relaxed = solve_vrptw_relaxed_soft_timewindows(
+                depot, solve_cfg, time_matrix_min, node_tws, service_mins,
+                soft_penalty_per_min=1000,
+            )
+            if relaxed is None:
+                st.error("❌ Keine harte Lösung. Auch die Relaxierung liefert keine Lösung. "
+                         "Prüfe Matrix und Depotfenster.")
+                st.stop()
+
+            routes     = relaxed["routes"]
+            violations = relaxed["violations"]
+
+    # ── Exporte im Hintergrund starten (laufen, während die Tabs aufgebaut werden) ──
+    fut_xlsx = _export_executor().submit(
+        export_solution_to_excel,
+        day=solve_cfg.reference_date,
+        routes=routes,
+        labels=labels,
+        coords=coords,
+        node_meta_df=node_meta_df,
+        time_matrix_min=time_matrix_min,
+        dist_matrix_m=dist_matrix_m,
+        node_service_mins=service_mins,
+    )
+    fut_map = _export_executor().submit(
+        export_routes_map_html,
+        routes=routes,
+        labels=labels,
+        coords=coords,
+        node_senders=node_senders,
+        node_addresses=node_addresses,
+        time_origin=datetime.combine(solve_cfg.reference_date, dt_time(0, 0)),
+    )
+
+    return {
+        "labels":         labels,
+        "node_senders":   node_senders,
+        "node_addresses": node_addresses,
+        "node_meta_df":   node_meta_df,
+        "stats":          stats,
+        "problems":       problems,
+        "routes":         routes,
+        "node_routes":    node_routes,
+        "violations":     violations,
+        "route_totals":   compute_route_totals(routes, time_matrix_min, dist_matrix_m, service_mins),
+        "fut_xlsx":       fut_xlsx,
+        "fut_map":        fut_map,
+    }
+
+
 # ── Seiten-Setup ────────────────────────────────────────────────────
 st.set_page_config(page_title="Fenner Tourenoptimierung", layout="wide")
 st.title("🚗 Fenner Tourenoptimierung")
@@ -60,6 +205,17 @@ with st.sidebar:
     max_route_dur = st.number_input("Max. Tourdauer (min)",     min_value=0, max_value=720, value=240,
                                     help="0 = keine Begrenzung. Standard: 240 min (4 Stunden)")
     ref_date      = st.date_input("Referenzdatum", value=date.today())
+    first_strategy = st.selectbox(
+        "Startheuristik",
+        ["PARALLEL_CHEAPEST_INSERTION", "SAVINGS", "PATH_CHEAPEST_ARC", "LOCAL_CHEAPEST_INSERTION"],
+        help="Erste Lösung, die Guided Local Search anschließend verbessert",
+    )
+    search_workers = st.number_input("Parallele Suchläufe", min_value=1, max_value=12, value=1,
+                                     help="Mehrere Heuristik-Kombinationen gleichzeitig (je ein CPU-Kern), "
+                                          "die beste Lösung gewinnt; höchstens so viele wie CPU-Kerne")
+    stall_limit   = st.number_input("Abbruch ohne Verbesserung (s)", min_value=0, max_value=30, value=0,
+                                    help="Suche beenden, wenn sich die Lösung so lange nicht verbessert. "
+                                         "0 = volles Zeitlimit (30 s, ohne harte Lösung 10 s)")
 
     st.subheader("Kosten")
     cost_ct_per_km = st.number_input("Streckenkosten (ct/km)", min_value=0, max_value=500, value=30,
@@ -72,7 +228,7 @@ with st.sidebar:
 uploaded = st.file_uploader("📂 Einsender-Datei (.xlsx) hochladen", type=["xlsx"])
 run = st.button("🚀 Berechnen", type="primary", disabled=(uploaded is None))
 
-if not run or uploaded is None:
+if uploaded is None:
     st.stop()
 
 # ── Konfiguration zusammenbauen ─────────────────────────────────────
@@ -88,230 +244,181 @@ solve_cfg = SolveConfig(
     default_service_min=service_min,
     max_wait_min=max_wait,
     max_route_duration_min=max_route_dur,
+    first_solution_strategy=first_strategy,
+    stall_limit_s=stall_limit,
+    search_workers=search_workers,
 )
-# Basiszeit für Uhrzeitumrechnung (00:00 des Referenzdatums)
-time_origin = datetime.combine(ref_date, dt_time(0, 0))
-
-# ── Schritt 1: Daten laden ──────────────────────────────────────────
-with st.spinner("Lade Eingabedaten …"):
-    try:
-        df = load_einsender_excel(uploaded, solve_cfg)
-        coords, node_tws, service_mins, labels, node_senders, node_addresses, node_meta_df = (
-            build_nodes_mandatory_both_windows(depot, df, solve_cfg)
-        )
-    except Exception as e:
-        st.error(f"Fehler beim Laden der Datei: {e}")
-        st.stop()
-
-if len(coords) <= 1:
-    st.error("Keine Abholfenster im Input gefunden – prüfe 'Abholung 1 von/bis'.")
-    st.stop()
 
-# ── Schritt 2: Matrix ───────────────────────────────────────────────
-with st.spinner("Berechne Fahrzeit-Matrix (OSRM) …"):
-    try:
-        time_matrix_min, dist_matrix_m = build_matrices(coords)
-    except Exception as e:
-        st.error(f"Fehler bei Matrix-Berechnung: {e}")
+# ── Schritte 1–4: nur bei neuer Datei/Konfiguration rechnen ────────
+# Lösung bleibt über Reruns erhalten (z.B. Kostensätze ändern), solange
+# Datei und Konfiguration gleich sind – sonst erst nach "Berechnen" neu.
+# Datei über ihren Inhalt erkennen: eine geänderte Datei mit gleichem Namen
+# und gleicher Größe darf nicht als "schon gerechnet" gelten.
+file_digest  = hashlib.sha1(uploaded.getvalue()).hexdigest()
+solution_key = (uploaded.name, file_digest, depot, solve_cfg)
+solution = st.session_state.get("solution")
+if run or solution is None or solution["key"] != solution_key:
+    if not run:
         st.stop()
-
-# ── Schritt 3: Prechecks ────────────────────────────────────────────
-depot_windows = depot_union_windows(depot, solve_cfg)
-stats = summarize_input(df, node_meta_df)
-
+    # Gleiche Datei (gleiche Nodes), nur andere Konfiguration → letzte harte Lösung als Warmstart
+    warm_start = None
+    if (solution is not None and solution["key"][:2] == solution_key[:2] and solution["key"] != solution_key
+            and solution["node_routes"]):
+        warm_start = tuple(tuple(route) for route in solution["node_routes"])
+    solution = {"key": solution_key, **_compute_solution(uploaded, depot, solve_cfg, warm_start)}
+    st.session_state["solution"] = solution
+
+labels         = solution["labels"]
+node_senders   = solution["node_senders"]
+node_addresses = solution["node_addresses"]
+node_meta_df   = solution["node_meta_df"]
+routes         = solution["routes"]
+violations     = solution["violations"]
+is_relaxed     = violations is not None
+
+# ── Prechecks + Solver-Status ───────────────────────────────────────
+stats = solution["stats"]
 m1, m2, m3, m4 = st.columns(4)
 m1.metric("Einsender",     stats["einsender_rows"])
 m2.metric("Pflicht-Nodes", stats["mandatory_nodes_created"])
 m3.metric("Fahrzeuge",     num_vehicles)
 m4.metric("Leere Fenster", stats["tw1_empty"] + stats["tw2_empty"])
 
-problems = (
-    check_depot_union(depot_windows)
-    + check_basic_nodes(node_tws, labels)
-    + check_matrix_sanity(time_matrix_min)
-    + check_reachability_quick(node_tws, service_mins, time_matrix_min, depot_windows, labels)
-)
+problems = solution["problems"]
 if problems:
     with st.expander(f"⚠️ {len(problems)} Precheck-Problem(e) gefunden", expanded=True):
         for p in problems[:80]:
             st.warning(p)
 
-# ── Schritt 4: Optimieren ───────────────────────────────────────────
-is_relaxed = False
-with st.spinner("Optimiere Routen …"):
-    try:
-        result = solve_vrptw(depot, solve_cfg, time_matrix_min, node_tws, service_mins)
-        routes = result["routes"]
-        st.success(f"✅ Harte Lösung gefunden – {len(routes)} Route(n).")
-
-    except RuntimeError as exc:
-        if str(exc) != "INFEASIBLE":
-            st.exception(exc)
-            st.stop()
-
-        st.error("❌ Keine harte Lösung. Berechne Debug-Relaxation …")
-        relaxed = solve_vrptw_relaxed_soft_timewindows(
-            depot, solve_cfg, time_matrix_min, node_tws, service_mins,
-            soft_penalty_per_min=1000,
-        )
-        if relaxed is None:
-            st.error("Auch die Relaxierung liefert keine Lösung. Prüfe Matrix und Depotfenster.")
-            st.stop()
-
-        routes     = relaxed["routes"]
-        is_relaxed = True
-
-        violations = relaxed["violations"]
-        with st.expander(f"🔎 {len(violations)} Zeitfenster-Verletzungen (relaxed)", expanded=True):
-            for v in violations[:20]:
-                s, e = v["tw"]
-                st.warning(
-                    f"**{labels[v['node']]}** @ {v['time_min']} min "
-                    f"(TW {s}–{e}) | zu spät: {v['late_min']} min | zu früh: {v['early_min']} min"
-                )
+if not is_relaxed:
+    st.success(f"✅ Harte Lösung gefunden – {len(routes)} Route(n).")
+else:
+    st.error("❌ Keine harte Lösung. Angezeigt wird die Debug-Relaxation.")
+    with st.expander(f"🔎 {len(violations)} Zeitfenster-Verletzungen (relaxed)", expanded=True):
+        # Eine Tabelle statt je Verletzung ein eigenes st.warning-Element
+        top_v = pd.DataFrame(violations[:20], columns=["node", "time_min", "early_min", "late_min", "tw"])
+        tw_v  = np.asarray(top_v["tw"].tolist(), dtype=np.int64).reshape(-1, 2)
+        st.dataframe(pa.table({
+            "Einsender":     pa.array(np.asarray(labels, dtype=object)[top_v["node"].to_numpy(dtype=np.int64)],
+                                      pa.string()),
+            "Ankunft (min)": pa.array(top_v["time_min"], pa.int64()),
+            "TW von (min)":  pa.array(tw_v[:, 0], pa.int64()),
+            "TW bis (min)":  pa.array(tw_v[:, 1], pa.int64()),
+            "Zu spät (min)": pa.array(top_v["late_min"], pa.int64()),
+            "Zu früh (min)": pa.array(top_v["early_min"], pa.int64()),
+        }), use_container_width=True, hide_index=True)
 
 # ── Schritt 5: Ergebnisse anzeigen ──────────────────────────────────
+# Uhrzeit-Lookup für alle Tabs: jede vorkommende Minute nur einmal formatieren
+all_mins = (
+    {int(step[1]) for route in routes for step in route}
+    | set(node_meta_df["tw_start_min"].astype(int))
+    | set(node_meta_df["tw_end_min"].astype(int))
+)
+mm2hhmm = {m: fmt_min_to_hhmm(solve_cfg.reference_date, m) for m in all_mins}
+
 tab_map, tab_routes, tab_einsender, tab_costs, tab_dl = st.tabs(
     ["🗺️ Karte", "📋 Routen", "🏥 Einsender", "💰 Kosten", "📥 Download"]
 )
 
-# ── Tab: Karte ──────────────────────────────────────────────────────
-with tab_map:
-    m = export_routes_map_html(
-        routes=routes,
-        labels=labels,
-        coords=coords,
-        node_senders=node_senders,
-        node_addresses=node_addresses,
-        time_origin=time_origin,
-    )
-    components.html(m._repr_html_(), height=640)
-
 # ── Tab: Routen ─────────────────────────────────────────────────────
 with tab_routes:
+    senders_arr   = np.asarray(node_senders, dtype=object)
+    addresses_arr = np.asarray(node_addresses, dtype=object)
+
     for i, route in enumerate(routes, start=1):
-        n_stops = sum(1 for step in route if step[0] != 0)
+        arr     = np.asarray(route, dtype=np.int64)
+        nodes   = arr[:, 0]
+        slacks  = arr[:, 2] if arr.shape[1] > 2 else np.zeros(len(arr), dtype=np.int64)
+        senders = senders_arr[nodes]
+        n_stops = int((nodes != 0).sum())
         with st.expander(f"Route #{i}  –  {n_stops} Stopp(s)", expanded=True):
-            rows = []
-            for step in route:
-                node = step[0]
-                tmin = int(step[1])
-                slack = int(step[2]) if len(step) > 2 else 0
-                rows.append({
-                    "Uhrzeit":   fmt_min_to_hhmm(solve_cfg.reference_date, tmin),
-                    "Einsender": node_senders[node] if node_senders[node] else "LABOR (Depot)",
-                    "Adresse":   node_addresses[node],
-                    "Wartezeit": f"{slack} min" if slack else "—",
-                })
-            st.dataframe(rows, use_container_width=True, hide_index=True)
+            route_tbl = pa.table({
+                "Uhrzeit":   pa.array([mm2hhmm[t] for t in arr[:, 1].tolist()], pa.string()),
+                "Einsender": pa.array(np.where(senders != "", senders, "LABOR (Depot)"), pa.string()),
+                "Adresse":   pa.array(addresses_arr[nodes], pa.string()),
+                "Wartezeit": pa.array(np.where(slacks != 0, slacks.astype(str) + " min", "—"), pa.string()),
+            })
+            st.dataframe(route_tbl, use_container_width=True, hide_index=True)
 
 # ── Tab: Einsender ──────────────────────────────────────────────────
 with tab_einsender:
-    # Baue Mapping: node_index → (route_id, arrival_min)
-    node_to_route: dict[int, tuple[int, int]] = {}
-    for r_idx, route in enumerate(routes, start=1):
-        for step in route:
-            node = step[0]
-            tmin = int(step[1])
-            if node != 0:
-                node_to_route[node] = (r_idx, tmin)
-
-    einsender_rows = []
-    for _, meta in node_meta_df.iterrows():
-        node_idx = int(meta["node_index"])
-        route_id, arrival = node_to_route.get(node_idx, (None, None))
-
-        tw_s = fmt_min_to_hhmm(solve_cfg.reference_date, int(meta["tw_start_min"]))
-        tw_e = fmt_min_to_hhmm(solve_cfg.reference_date, int(meta["tw_end_min"]))
-
-        einsender_rows.append({
-            "Einsender":   meta.get("einsender_name", meta["einsender_id"]),
-            "Adresse":     meta.get("adresse", ""),
-            "Abholung":    f"Abh. {int(meta['pickup_no'])}",
-            "Route":       f"Route {route_id}" if route_id else "—",
-            "Ankunft":     fmt_min_to_hhmm(solve_cfg.reference_date, arrival) if arrival is not None else "—",
-            "Zeitfenster": f"{tw_s} – {tw_e}",
-        })
-
-    einsender_df = pd.DataFrame(einsender_rows)
-    st.dataframe(einsender_df, use_container_width=True, hide_index=True)
+    # Node-Indizes sind dicht (0..N-1) → Route/Ankunft per Array-Scatter statt Dict
+    steps     = np.asarray([step[:2] for route in routes for step in route], dtype=np.int32).reshape(-1, 2)
+    step_rids = np.repeat(np.arange(1, len(routes) + 1, dtype=np.int32), [len(route) for route in routes])
+    is_stop   = steps[:, 0] != 0
+
+    route_of_node   = np.full(len(labels), -1, dtype=np.int32)
+    arrival_of_node = np.full(len(labels), -1, dtype=np.int32)
+    route_of_node[steps[is_stop, 0]]   = step_rids[is_stop]
+    arrival_of_node[steps[is_stop, 0]] = steps[is_stop, 1]
+
+    node_idx = node_meta_df["node_index"].to_numpy()
+    df_e = node_meta_df.assign(
+        route_id=route_of_node[node_idx],
+        arrival_min=arrival_of_node[node_idx],
+    )
+
+    has_route = df_e["route_id"] >= 0
+    einsender_tbl = pa.table({
+        "Einsender":   pa.array(df_e["einsender_name"], pa.string()),
+        "Adresse":     pa.array(df_e["adresse"], pa.string()),
+        "Abholung":    pa.array("Abh. " + df_e["pickup_no"].astype(int).astype(str), pa.string()),
+        "Route":       pa.array(("Route " + df_e["route_id"].astype(str)).where(has_route, "—"), pa.string()),
+        "Ankunft":     pa.array(df_e["arrival_min"].map(mm2hhmm).where(has_route, "—"), pa.string()),
+        "Zeitfenster": pa.array(df_e["tw_start_min"].map(mm2hhmm) + " – " + df_e["tw_end_min"].map(mm2hhmm),
+                                pa.string()),
+    })
+    st.dataframe(einsender_tbl, use_container_width=True, hide_index=True)
 
 # ── Tab: Kosten ────────────────────────────────────────────────────
 with tab_costs:
-    route_totals = compute_route_totals(routes, time_matrix_min, dist_matrix_m, service_mins)
-
-    cost_rows = []
-    sum_dist = 0.0
-    sum_drive = 0
-    sum_wait = 0
-    sum_service = 0
-    sum_time = 0
-    sum_cost_dist = 0.0
-    sum_cost_time = 0.0
-    sum_cost_total = 0.0
-
-    for rt in route_totals:
-        k_strecke = rt["total_dist_km"] * (cost_ct_per_km / 100.0)
-        k_zeit = rt["total_time_min"] * (cost_eur_per_h / 60.0)
-        k_gesamt = k_strecke + k_zeit
-
-        sum_dist += rt["total_dist_km"]
-        sum_drive += rt["total_drive_min"]
-        sum_wait += rt["total_wait_min"]
-        sum_service += rt["total_service_min"]
-        sum_time += rt["total_time_min"]
-        sum_cost_dist += k_strecke
-        sum_cost_time += k_zeit
-        sum_cost_total += k_gesamt
-
-        cost_rows.append({
-            "Route": f"Route {rt['route_id']}",
-            "Stopps": rt["n_stops"],
-            "Distanz (km)": f"{rt['total_dist_km']:.1f}",
-            "Fahrzeit (min)": rt["total_drive_min"],
-            "Wartezeit (min)": rt["total_wait_min"],
-            "Service (min)": rt["total_service_min"],
-            "Gesamtzeit (min)": rt["total_time_min"],
-            "Strecke (EUR)": f"{k_strecke:.2f}",
-            "Zeit (EUR)": f"{k_zeit:.2f}",
-            "Gesamt (EUR)": f"{k_gesamt:.2f}",
-        })
-
-    # Summenzeile
-    cost_rows.append({
-        "Route": "GESAMT",
-        "Stopps": sum(rt["n_stops"] for rt in route_totals),
-        "Distanz (km)": f"{sum_dist:.1f}",
-        "Fahrzeit (min)": sum_drive,
-        "Wartezeit (min)": sum_wait,
-        "Service (min)": sum_service,
-        "Gesamtzeit (min)": sum_time,
-        "Strecke (EUR)": f"{sum_cost_dist:.2f}",
-        "Zeit (EUR)": f"{sum_cost_time:.2f}",
-        "Gesamt (EUR)": f"{sum_cost_total:.2f}",
+    route_totals = solution["route_totals"]
+
+    totals_df = pd.DataFrame(route_totals, columns=[
+        "route_id", "n_stops", "total_dist_km", "total_drive_min",
+        "total_wait_min", "total_service_min", "total_time_min",
+    ])
+    totals_df["k_strecke"] = totals_df["total_dist_km"] * (cost_ct_per_km / 100.0)
+    totals_df["k_zeit"]    = totals_df["total_time_min"] * (cost_eur_per_h / 60.0)
+    totals_df["k_gesamt"]  = totals_df["k_strecke"] + totals_df["k_zeit"]
+
+    # Summenzeile (Spaltentypen beibehalten, damit Minuten ganzzahlig bleiben)
+    sum_row = totals_df.sum().to_frame().T.astype(totals_df.dtypes)
+    with_sum = pd.concat([totals_df, sum_row], ignore_index=True)
+    total = with_sum.iloc[-1]
+
+    cost_tbl = pa.table({
+        "Route":            pa.array(("Route " + totals_df["route_id"].astype(str)).tolist() + ["GESAMT"],
+                                     pa.string()),
+        "Stopps":           pa.array(with_sum["n_stops"], pa.int64()),
+        "Distanz (km)":     pa.array(with_sum["total_dist_km"].map("{:.1f}".format), pa.string()),
+        "Fahrzeit (min)":   pa.array(with_sum["total_drive_min"], pa.int64()),
+        "Wartezeit (min)":  pa.array(with_sum["total_wait_min"], pa.int64()),
+        "Service (min)":    pa.array(with_sum["total_service_min"], pa.int64()),
+        "Gesamtzeit (min)": pa.array(with_sum["total_time_min"], pa.int64()),
+        "Strecke (EUR)":    pa.array(with_sum["k_strecke"].map("{:.2f}".format), pa.string()),
+        "Zeit (EUR)":       pa.array(with_sum["k_zeit"].map("{:.2f}".format), pa.string()),
+        "Gesamt (EUR)":     pa.array(with_sum["k_gesamt"].map("{:.2f}".format), pa.string()),
     })
 
     # Kennzahlen-Kacheln
     k1, k2, k3, k4 = st.columns(4)
-    k1.metric("Gesamtkosten", f"{sum_cost_total:.2f} EUR")
-    k2.metric("davon Strecke", f"{sum_cost_dist:.2f} EUR")
-    k3.metric("davon Zeit", f"{sum_cost_time:.2f} EUR")
-    k4.metric("Gesamt-km", f"{sum_dist:.1f} km")
+    k1.metric("Gesamtkosten", f"{total['k_gesamt']:.2f} EUR")
+    k2.metric("davon Strecke", f"{total['k_strecke']:.2f} EUR")
+    k3.metric("davon Zeit", f"{total['k_zeit']:.2f} EUR")
+    k4.metric("Gesamt-km", f"{total['total_dist_km']:.1f} km")
 
-    st.dataframe(cost_rows, use_container_width=True, hide_index=True)
+    st.dataframe(cost_tbl, use_container_width=True, hide_index=True)
+
+# ── Tab: Karte ──────────────────────────────────────────────────────
+# Erst nach den Tabellen-Tabs befüllt, damit die Karte bis dahin im Hintergrund fertig wird
+with tab_map:
+    components.html(solution["fut_map"].result()._repr_html_(), height=640)
 
 # ── Tab: Download ────────────────────────────────────────────────────
 with tab_dl:
-    excel_bytes = export_solution_to_excel(
-        day=solve_cfg.reference_date,
-        routes=routes,
-        labels=labels,
-        coords=coords,
-        node_meta_df=node_meta_df,
-        time_matrix_min=time_matrix_min,
-        dist_matrix_m=dist_matrix_m,
-        node_service_mins=service_mins,
-    )
+    excel_bytes = solution["fut_xlsx"].result()
     fname = "solution_relaxed.xlsx" if is_relaxed else "solution.xlsx"
     st.download_button(
         label="📊 Excel herunterladen",
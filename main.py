@@ -4,6 +4,7 @@ Web-Frontend: streamlit run app.py
 """
 from __future__ import annotations
 
+import sys
 import warnings
 from datetime import date
 
@@ -66,26 +67,25 @@ def main():
             "Prüfe die Spalten 'Abholung 1 von/bis' und 'Abholung 2 von/bis'."
         )
 
-    # ── 2) Matrix bauen ─────────────────────────────────────────────
-    time_matrix_min, dist_matrix_m = build_matrices(coords)
-
-    # ── 3) Vorab-Checks ─────────────────────────────────────────────
+    # ── 2) Input-Checks (ohne Matrix) ───────────────────────────────
+    # Vor dem Matrix-Aufbau: bei kaputtem Input keine Minuten an OSRM-Requests verlieren
     depot_windows = depot_union_windows(depot, solve_cfg)
     print("Input-Statistik:", summarize_input(df, node_meta_df))
 
+    input_problems = check_depot_union(depot_windows) + check_basic_nodes(node_tws, labels)
+    if input_problems:
+        _print_problems(input_problems)
+        raise RuntimeError("Ungültige Zeitfenster im Input – Matrix wird nicht berechnet.")
+
+    # ── 3) Matrix bauen + Matrix-Checks ─────────────────────────────
+    time_matrix_min, dist_matrix_m = build_matrices(coords)
+
     problems = (
-        check_depot_union(depot_windows)
-        + check_basic_nodes(node_tws, labels)
-        + check_matrix_sanity(time_matrix_min)
+        check_matrix_sanity(time_matrix_min)
         + check_reachability_quick(node_tws, service_mins, time_matrix_min, depot_windows, labels)
     )
     if problems:
-        print("\n=== PRECHECK PROBLEMS ===")
-        for p in problems[:80]:
-            print(" -", p)
-        if len(problems) > 80:
-            print(f" ... {len(problems) - 80} weitere")
-        print("=== Ende PRECHECK ===\n")
+        _print_problems(problems)
 
     # ── 4) Solve (hart) ─────────────────────────────────────────────
     try:
@@ -137,11 +137,14 @@ def main():
         print(f"  {fmt_min_to_hhmm(solve_cfg.reference_date, s)} - {fmt_min_to_hhmm(solve_cfg.reference_date, e)}")
     print()
 
+    # Alle Routen in einem Puffer sammeln und einmal schreiben statt print() je Stopp
+    lines = []
     for i, route in enumerate(routes, start=1):
-        print(f"Route #{i}")
+        lines.append(f"Route #{i}\n")
         for node, tmin, slack in route:
-            print(f"  {fmt_min_to_hhmm(solve_cfg.reference_date, tmin)} (+wait {slack}m) -> {labels[node]}")
-        print()
+            lines.append(f"  {fmt_min_to_hhmm(solve_cfg.reference_date, tmin)} (+wait {slack}m) -> {labels[node]}\n")
+        lines.append("\n")
+    sys.stdout.write("".join(lines))
 
     with open(excel_out, "wb") as f:
         f.write(export_solution_to_excel(
@@ -159,5 +162,14 @@ def main():
     print(f"✅ Karte exportiert: {map_out}")
 
 
+def _print_problems(problems: list[str]) -> None:
+    print("\n=== PRECHECK PROBLEMS ===")
+    for p in problems[:80]:
+        print(" -", p)
+    if len(problems) > 80:
+        print(f" ... {len(problems) - 80} weitere")
+    print("=== Ende PRECHECK ===\n")
+
+
 if __name__ == "__main__":
     main()
@@ -1,10 +1,10 @@
 from __future__ import annotations
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
 
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DepotConfig:
     lat: float
     lon: float
@@ -18,13 +18,14 @@ class DepotConfig:
     depot_3_bis: str | None = None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class SolveConfig:
     # Anzahl Fahrer / Touren
     num_vehicles: int = 6
 
     # Wenn Excel nur "HH:MM" hat, wird es an reference_date gehängt
-    reference_date: date = date.today()
+    # (default_factory: "heute" pro Instanz, nicht einmalig beim Import)
+    reference_date: date = field(default_factory=date.today)
 
     # Servicezeit je Abholung
     default_service_min: int = 5
@@ -34,3 +35,19 @@ class SolveConfig:
 
     # Harte Maximaldauer pro Route in Minuten
     max_route_duration_min: int = 240
+
+    # Startheuristik des Solvers (Name aus OR-Tools FirstSolutionStrategy,
+    # z.B. "PARALLEL_CHEAPEST_INSERTION", "SAVINGS", "PATH_CHEAPEST_ARC")
+    first_solution_strategy: str = "PARALLEL_CHEAPEST_INSERTION"
+
+    # Metaheuristik nach der Startlösung (Name aus OR-Tools LocalSearchMetaheuristic)
+    local_search_metaheuristic: str = "GUIDED_LOCAL_SEARCH"
+
+    # Suche vorzeitig beenden, wenn sich die beste Lösung so viele Sekunden
+    # nicht mehr verbessert hat (0 = immer volles Zeitlimit ausschöpfen).
+    # Standardmäßig aus: GLS findet oft auch nach längeren Plateaus noch Verbesserungen
+    stall_limit_s: int = 0
+
+    # Parallele Suchläufe (Prozesse) mit verschiedenen Startheuristik/Metaheuristik-
+    # Kombinationen; die beste Lösung gewinnt (1 = nur die konfigurierte Kombination)
+    search_workers: int = 1
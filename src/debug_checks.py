@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import math
+import numpy as np
 import pandas as pd
 
+from .io_excel import node_tw_array
+from .matrix import as_matrix
+
 
 def check_basic_nodes(node_tws, labels):
     """
@@ -41,6 +45,20 @@ def check_matrix_sanity(time_matrix_min, max_reasonable_min=24*60):
       - keine extremen 'unendlich'-Werte (z.B. 1e6 aus Google fallback)
     """
     n = len(time_matrix_min)
+    arr = _as_square_matrix(time_matrix_min)
+
+    if arr is not None:
+        # Schnellpfad für den Normalfall: zwei Reduktionen, keine Masken
+        if arr.size == 0 or (arr.min() >= 0 and arr.max() <= min(max_reasonable_min, 1_000_000 - 1)):
+            return []
+
+        # Ein vektorisierter Durchlauf; Meldungen nur für die (wenigen) auffälligen Zellen
+        probs = []
+        for i, j in np.argwhere(_matrix_sanity_mask(arr, max_reasonable_min)).tolist():
+            probs.append(_matrix_cell_problem(i, j, arr[i, j].item(), max_reasonable_min))
+        return probs
+
+    # Ungleichmäßige Zeilen oder None-Werte: jede Zelle einzeln prüfen
     probs = []
     for i, row in enumerate(time_matrix_min):
         if len(row) != n:
@@ -49,15 +67,36 @@ def check_matrix_sanity(time_matrix_min, max_reasonable_min=24*60):
         for j, v in enumerate(row):
             if v is None:
                 probs.append(f"Matrix: None bei ({i},{j})")
-            elif v < 0:
-                probs.append(f"Matrix: negativ bei ({i},{j}) = {v}")
-            elif v >= 1_000_000:
-                probs.append(f"Matrix: 'unendlich' bei ({i},{j}) = {v} (Google status!=OK?)")
-            elif v > max_reasonable_min:
-                probs.append(f"Matrix: ungewöhnlich groß bei ({i},{j}) = {v} min")
+            elif v < 0 or v >= 1_000_000 or v > max_reasonable_min:
+                probs.append(_matrix_cell_problem(i, j, v, max_reasonable_min))
     return probs
 
 
+def _matrix_cell_problem(i: int, j: int, v, max_reasonable_min) -> str:
+    if v < 0:
+        return f"Matrix: negativ bei ({i},{j}) = {v}"
+    if v >= 1_000_000:
+        return f"Matrix: 'unendlich' bei ({i},{j}) = {v} (Google status!=OK?)"
+    return f"Matrix: ungewöhnlich groß bei ({i},{j}) = {v} min"
+
+
+def _as_square_matrix(time_matrix_min) -> np.ndarray | None:
+    """Numerisches N×N-Array – oder None bei ungleichmäßigen Zeilen / None-Werten."""
+    try:
+        arr = as_matrix(time_matrix_min)
+    except ValueError:
+        return None
+    n = len(time_matrix_min)
+    if arr.dtype == object or arr.shape != (n, n):
+        return None
+    return arr
+
+
+def _matrix_sanity_mask(arr: np.ndarray, max_reasonable_min) -> np.ndarray:
+    """Vektorisierter Kern von check_matrix_sanity: True für jede auffällige Zelle."""
+    return (arr < 0) | (arr >= 1_000_000) | (arr > max_reasonable_min)
+
+
 def check_reachability_quick(
         node_tws,
         service_mins,
@@ -75,43 +114,64 @@ def check_reachability_quick(
         Depot -> Node innerhalb Node-TW erreichbar ist (mit freiem Start)
         und danach Node -> Depot so, dass Ankunft in ein Depotfenster fällt.
     """
-    probs = []
+    tws = node_tws if isinstance(node_tws, np.ndarray) else node_tw_array(node_tws)
+    tm  = as_matrix(time_matrix_min)
+    svc = np.asarray(service_mins, dtype=np.int64)
+    # Spätestes Depot-Fensterende (ohne Depotfenster passt keine Rückkehr)
+    max_depot_end = max((w_end for _w_start, w_end in depot_windows), default=np.iinfo(np.int64).min)
 
-    def any_depot_window_can_accept(arrival_min: int) -> bool:
-        # Ankunft kann auch "zu früh" sein -> warten bis Fenster öffnet.
-        # Daher reicht: es gibt ein Fenster mit w_end >= arrival_min
-        return any(arrival_min <= w_end for (w_start, w_end) in depot_windows)
+    bad_to, bad_back, no_window = _reachability_flags(tws, svc, tm, max_depot_end)
 
-    for node in range(1, len(node_tws)):
-        s, e = node_tws[node]
-        travel_to = time_matrix_min[0][node]
-        travel_back = time_matrix_min[node][0]
-        service = service_mins[node]
+    # Meldungen nur für die (wenigen) auffälligen Nodes formatieren
+    probs = []
+    for k in np.flatnonzero(bad_to | bad_back | no_window):
+        node = int(k) + 1
+        travel_to = int(tm[0, node])
+        travel_back = int(tm[node, 0])
+        latest_finish = int(tws[node, 1]) + int(svc[node])
 
-        # Mit freiem Start kann man die Ankunft im Node-Fenster immer "treffen",
-        # solange travel_to endlich ist.
-        if travel_to >= 1_000_000:
+        if bad_to[k]:
             probs.append(f"{labels[node]}: Depot->Node nicht routbar (Matrix='unendlich', travel={travel_to})")
-            continue
-
-        # Worst-case Rückkehr: wenn man am spätesten Zeitpunkt (TW-Ende) fertig wird
-        latest_finish = e + service
-        arrival_depot = latest_finish + travel_back
-
-        if travel_back >= 1_000_000:
+        elif bad_back[k]:
             probs.append(f"{labels[node]}: Node->Depot nicht routbar (Matrix='unendlich', travel_back={travel_back})")
-            continue
-
-        if not any_depot_window_can_accept(arrival_depot):
+        else:
             probs.append(
                 f"{labels[node]}: Rückkehr passt in kein Depotfenster. "
-                f"Spätestes Finish {latest_finish} + Rückfahrt {travel_back} => Ankunft {arrival_depot}, "
+                f"Spätestes Finish {latest_finish} + Rückfahrt {travel_back} => Ankunft {latest_finish + travel_back}, "
                 f"Depotfenster {depot_windows}."
             )
 
     return probs
 
 
+def _reachability_flags(
+        tws: np.ndarray,
+        svc: np.ndarray,
+        tm: np.ndarray,
+        max_depot_end: int,
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Vektorisierter Kern von check_reachability_quick – ein Eintrag je Kunden-Node (1..N-1):
+      bad_to:    Depot->Node nicht routbar
+      bad_back:  Node->Depot nicht routbar
+      no_window: Rückkehr (spätestes Finish + Rückfahrt) passt in kein Depotfenster
+    Die Flags schließen sich gegenseitig aus (Priorität wie oben).
+    """
+    travel_to = tm[0, 1:]
+    travel_back = tm[1:, 0]
+
+    bad_to = travel_to >= 1_000_000
+    bad_back = ~bad_to & (travel_back >= 1_000_000)
+
+    # Ankunft kann auch "zu früh" sein -> warten bis Fenster öffnet.
+    # Daher reicht: es gibt ein Fenster mit w_end >= arrival, d.h. arrival <= max_depot_end
+    arrival_depot = tws[1:, 1].astype(np.int64) + svc[1:] + travel_back
+    accepted = arrival_depot <= max_depot_end
+    no_window = ~bad_to & ~bad_back & ~accepted
+
+    return bad_to, bad_back, no_window
+
+
 def summarize_input(df: pd.DataFrame, node_meta_df: pd.DataFrame):
     """
     Hilfreiche Statistik: wie viele Einsender, wie viele Nodes (Pickups), wie viele leere Fenster.
@@ -1,25 +1,79 @@
 from __future__ import annotations
 
+import math
 from io import BytesIO
 from datetime import datetime, date, time, timedelta
 
+import numpy as np
 import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 
+from .matrix import as_matrix
 from .route_stats import compute_route_totals
 
+try:
+    import xlsxwriter
+except ImportError:  # optional: schnellerer Excel-Writer, sonst openpyxl
+    xlsxwriter = None
+
+
+# Gleiches Datumsformat wie pandas' to_excel
+_DATETIME_FORMAT = "YYYY-MM-DD HH:MM:SS"
+
 
 def fmt_min_to_datetime(day: date, mins: int) -> datetime:
     return datetime.combine(day, time(0, 0)) + timedelta(minutes=mins)
 
 
+def _frame_rows(df: pd.DataFrame):
+    """Kopfzeile + Werte eines DataFrames als Zeilen-Listen (NaN → leere Zelle)."""
+    yield [str(c) for c in df.columns]
+    for row in df.itertuples(index=False, name=None):
+        yield [None if isinstance(v, float) and math.isnan(v) else v for v in row]
+
+
+def _write_workbook_xlsxwriter(sheets: dict[str, pd.DataFrame]) -> bytes:
+    """xlsxwriter im constant_memory-Modus: jede Zeile wird sofort als XML weggeschrieben."""
+    buf = BytesIO()
+    wb = xlsxwriter.Workbook(buf, {"constant_memory": True, "default_date_format": _DATETIME_FORMAT})
+    for sheet_name, df in sheets.items():
+        ws = wb.add_worksheet(sheet_name)
+        if df.columns.empty:
+            continue
+        for r, values in enumerate(_frame_rows(df)):
+            ws.write_row(r, 0, values)
+    wb.close()
+    return buf.getvalue()
+
+
+def _write_workbook_openpyxl(sheets: dict[str, pd.DataFrame]) -> bytes:
+    """Fallback ohne xlsxwriter: Write-Only-Workbook (Zeilen direkt serialisiert statt als Zell-Objekte)."""
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        ws = wb.create_sheet(sheet_name)
+        if df.columns.empty:
+            continue
+        for values in _frame_rows(df):
+            for k, v in enumerate(values):
+                if isinstance(v, datetime):
+                    values[k] = WriteOnlyCell(ws, value=v)
+                    values[k].number_format = _DATETIME_FORMAT
+            ws.append(values)
+
+    buf = BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
 def export_solution_to_excel(
         day: date,
         routes: list[list[tuple]],
         labels: list[str],
         coords: list[tuple[float, float]],
         node_meta_df: pd.DataFrame,
-        time_matrix_min: list[list[int]],
-        dist_matrix_m: list[list[int]],
+        time_matrix_min: np.ndarray,
+        dist_matrix_m: np.ndarray,
         node_service_mins: list[int],
 ) -> bytes:
     """
@@ -34,59 +88,56 @@ def export_solution_to_excel(
       - summary:      Überblick
     """
     # ── Zeile pro Stopp (Detail-Sheet) ─────────────────────────────────
-    rows = []
-
-    for r_idx, route in enumerate(routes, start=1):
-        if len(route) < 2:
-            continue
-
-        for seq, step in enumerate(route):
-            node = step[0]
-            tmin = int(step[1])
-            lat, lon = coords[node]
-
-            if seq == 0:
-                prev_node = None
-                travel = 0
-                dist_m = 0
-                service = 0
-                wait = 0
-            else:
-                prev_step = route[seq - 1]
-                prev_node = prev_step[0]
-                prev_tmin = int(prev_step[1])
-
-                travel = int(time_matrix_min[prev_node][node])
-                dist_m = int(dist_matrix_m[prev_node][node])
-                service = int(node_service_mins[node]) if node != 0 else 0
-
-                # Exakte Wartezeit; kann durch Rundungen leicht negativ werden -> clamp
-                wait = tmin - prev_tmin - travel - service
-                if wait < 0:
-                    wait = 0
-
-            rows.append({
-                "route_id": r_idx,
-                "seq": seq,
-                "node_index": node,
-                "label": labels[node],
-                "arrival_time": fmt_min_to_datetime(day, tmin),
-                "arrival_min": tmin,
-                "prev_node_index": prev_node,
-                "travel_min_from_prev": travel,
-                "wait_min_from_prev": wait,
-                "service_min_at_node": service,
-                "segment_total_min": travel + wait + service,
-                "dist_m_from_prev": dist_m,
-                "dist_km_from_prev": dist_m / 1000.0,
-                "lat": lat,
-                "lon": lon,
-            })
+    # Alle Stopps aller Routen flach hintereinander; Segmentwerte per Gather aus den Matrizen
+    used = [(r_idx, route) for r_idx, route in enumerate(routes, start=1) if len(route) >= 2]
+    lengths = np.asarray([len(route) for _r_idx, route in used], dtype=np.int64)
+
+    steps = np.asarray([step[:2] for _r_idx, route in used for step in route], dtype=np.int64).reshape(-1, 2)
+    arr_node = steps[:, 0]
+    arr_tmin = steps[:, 1]
+
+    arr_route_id = np.repeat(np.asarray([r_idx for r_idx, _route in used], dtype=np.int64), lengths)
+    route_starts = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    arr_seq      = np.arange(len(arr_node), dtype=np.int64) - route_starts
+    is_first     = arr_seq == 0
+
+    # Vorgänger innerhalb derselben Route (für die Startzeile bedeutungslos und maskiert)
+    prev_node = np.roll(arr_node, 1)
+    prev_tmin = np.roll(arr_tmin, 1)
+
+    tmat = as_matrix(time_matrix_min)
+    dmat = as_matrix(dist_matrix_m)
+    svc  = np.asarray(node_service_mins, dtype=np.int64)
+
+    arr_travel  = np.where(is_first, 0, tmat[prev_node, arr_node]).astype(np.int64)
+    arr_dist_m  = np.where(is_first, 0, dmat[prev_node, arr_node]).astype(np.int64)
+    arr_service = np.where(is_first | (arr_node == 0), 0, svc[arr_node])
+    # Exakte Wartezeit; kann durch Rundungen leicht negativ werden -> clamp
+    arr_wait    = np.where(is_first, 0, np.maximum(0, arr_tmin - prev_tmin - arr_travel - arr_service))
+    arr_prev    = np.where(is_first, np.nan, prev_node)    # Startzeile ohne Vorgänger → leere Zelle
+
+    coords_arr = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    routes_df = pd.DataFrame({
+        "route_id":             arr_route_id,
+        "seq":                  arr_seq,
+        "node_index":           arr_node,
+        "label":                np.asarray(labels, dtype=object)[arr_node],
+        "arrival_time":         pd.Timestamp(day) + pd.to_timedelta(arr_tmin, unit="m"),
+        "arrival_min":          arr_tmin,
+        "prev_node_index":      arr_prev,
+        "travel_min_from_prev": arr_travel,
+        "wait_min_from_prev":   arr_wait,
+        "service_min_at_node":  arr_service,
+        "segment_total_min":    arr_travel + arr_wait + arr_service,
+        "dist_m_from_prev":     arr_dist_m,
+        "dist_km_from_prev":    arr_dist_m / 1000.0,
+        "lat":                  coords_arr[arr_node, 0],
+        "lon":                  coords_arr[arr_node, 1],
+    }, copy=False)
 
     # ── Aggregierte Kennzahlen (via shared Funktion) ───────────────────
     totals = compute_route_totals(routes, time_matrix_min, dist_matrix_m, node_service_mins)
 
-    routes_df = pd.DataFrame(rows)
     totals_df = pd.DataFrame(totals)
     summary_df = pd.DataFrame([{
         "routes_used": int(len(totals_df)),
@@ -98,10 +149,12 @@ def export_solution_to_excel(
         "total_time_min_all_routes": int(totals_df["total_time_min"].sum()) if not totals_df.empty else 0,
     }])
 
-    buf = BytesIO()
-    with pd.ExcelWriter(buf, engine="openpyxl") as writer:
-        routes_df.to_excel(writer, index=False, sheet_name="routes")
-        totals_df.to_excel(writer, index=False, sheet_name="route_totals")
-        node_meta_df.to_excel(writer, index=False, sheet_name="nodes")
-        summary_df.to_excel(writer, index=False, sheet_name="summary")
-    return buf.getvalue()
+    sheets = {
+        "routes":       routes_df,
+        "route_totals": totals_df,
+        "nodes":        node_meta_df,
+        "summary":      summary_df,
+    }
+    if xlsxwriter is not None:
+        return _write_workbook_xlsxwriter(sheets)
+    return _write_workbook_openpyxl(sheets)
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 import folium
-from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from datetime import datetime
 from typing import Optional, Union
 
 # 12 gut unterscheidbare Farben für die Touren
@@ -62,28 +64,37 @@ def export_routes_map_html(
         icon=folium.Icon(color="black", icon="home", prefix="fa"),
     ).add_to(m)
 
+    # Uhrzeiten aller Stopps vorab: jede vorkommende Minute nur einmal formatieren
+    # (viele Stopps teilen sich Uhrzeiten); fehlende tmin → "n/a"
+    tmins = np.asarray([step[1] if len(step) > 1 else np.nan for route in routes for step in route], dtype=np.float64)
+    uniq_tmins, inverse = np.unique(tmins, return_inverse=True)
+    uniq_strs = np.asarray((pd.Timestamp(origin) + pd.to_timedelta(uniq_tmins, unit="m")).strftime(time_format),
+                           dtype=object)
+    all_time_strs = np.where(np.isnan(tmins), "n/a", uniq_strs[inverse])
+    route_offsets = np.cumsum([0] + [len(route) for route in routes])
+
+    # Längen der optionalen Listen einmal vorab statt je Stopp
+    n_senders   = len(node_senders)   if node_senders   else 0
+    n_addresses = len(node_addresses) if node_addresses else 0
+
     for r_idx, route in enumerate(routes, start=1):
         color = ROUTE_COLORS[(r_idx - 1) % len(ROUTE_COLORS)]
         latlons = []
+        features = []
+        time_strs = all_time_strs[route_offsets[r_idx - 1]:route_offsets[r_idx]]
 
-        for step in route:
-            node  = step[0]
-            tmin  = step[1] if len(step) > 1 else None
-            slack = step[2] if len(step) > 2 else 0
+        for seq, step in enumerate(route):
+            node     = step[0]
+            slack    = step[2] if len(step) > 2 else 0
+            time_str = time_strs[seq]
 
             lat, lon = coords[node]
+            label    = labels[node]
             latlons.append((lat, lon))
 
             # Hilfsdaten
-            sender  = (node_senders[node]   if node_senders   and node < len(node_senders)   else None) or labels[node]
-            address = (node_addresses[node] if node_addresses and node < len(node_addresses) else None) or ""
-
-            # Ankunftszeit als Uhrzeit
-            if tmin is not None:
-                real_dt    = origin + timedelta(minutes=float(tmin))
-                time_str   = real_dt.strftime(time_format)
-            else:
-                time_str = "n/a"
+            sender  = (node_senders[node]   if node < n_senders   else None) or label
+            address = (node_addresses[node] if node < n_addresses else None) or ""
 
             # ── Tooltip (erscheint beim Hover, kurz & knapp) ──────────────
             if node == 0:
@@ -96,40 +107,42 @@ def export_routes_map_html(
                 )
 
             # ── Popup (erscheint beim Klick, ausführlich) ─────────────────
-            popup_lines = [f"<b>Route {r_idx}: {labels[node]}</b>"]
-            if node != 0:
-                popup_lines.append(f"Einsender: {sender}")
-                if address:
-                    popup_lines.append(f"Adresse: {address}")
-            popup_lines.append(f"Ankunft: {time_str}")
-            if slack:
-                popup_lines.append(f"Wartezeit ≈ {int(slack)} min")
-
-            popup_html = "<br>".join(popup_lines)
-
-            # Depot-Stopp am Ende der Route: kleiner, durchsichtiger
-            if node == 0:
-                folium.CircleMarker(
-                    location=[lat, lon],
-                    radius=4,
-                    color=color,
-                    fill=True,
-                    fill_color=color,
-                    fill_opacity=0.3,
-                    popup=folium.Popup(popup_html, max_width=300),
-                    tooltip=folium.Tooltip(tooltip_html, sticky=True),
-                ).add_to(m)
-            else:
-                folium.CircleMarker(
-                    location=[lat, lon],
-                    radius=7,
-                    color=color,
-                    fill=True,
-                    fill_color=color,
-                    fill_opacity=0.85,
-                    popup=folium.Popup(popup_html, max_width=300),
-                    tooltip=folium.Tooltip(tooltip_html, sticky=True),
-                ).add_to(m)
+            popup_html = (
+                f"<b>Route {r_idx}: {label}</b>"
+                + (f"<br>Einsender: {sender}" if node != 0 else "")
+                + (f"<br>Adresse: {address}" if node != 0 and address else "")
+                + f"<br>Ankunft: {time_str}"
+                + (f"<br>Wartezeit ≈ {int(slack)} min" if slack else "")
+            )
+
+            features.append({
+                "type": "Feature",
+                "id": f"{r_idx}-{seq}",
+                "geometry": {"type": "Point", "coordinates": [lon, lat]},
+                "properties": {
+                    "tooltip": tooltip_html,
+                    "popup": popup_html,
+                    "depot": node == 0,
+                },
+            })
+
+        # Alle Stopps einer Route als EIN GeoJson-Layer statt je Stopp
+        # CircleMarker + Popup + Tooltip als eigene Folium-Elemente.
+        # Depot-Stopp am Ende der Route: kleiner, durchsichtiger
+        if features:
+            folium.GeoJson(
+                {"type": "FeatureCollection", "features": features},
+                marker=folium.CircleMarker(),
+                style_function=lambda f, color=color: {
+                    "color":       color,
+                    "fill":        True,
+                    "fillColor":   color,
+                    "fillOpacity": 0.3 if f["properties"]["depot"] else 0.85,
+                    "radius":      4 if f["properties"]["depot"] else 7,
+                },
+                tooltip=folium.GeoJsonTooltip(fields=["tooltip"], labels=False, sticky=True),
+                popup=folium.GeoJsonPopup(fields=["popup"], labels=False, localize=False, max_width=300),
+            ).add_to(m)
 
         # Linie der Route in der gleichen Farbe
         if len(latlons) >= 2:
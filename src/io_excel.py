@@ -1,19 +1,32 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, date, time
+from functools import lru_cache
 from dateutil import parser as dtparser
 
 from .config import SolveConfig, DepotConfig
 
+try:
+    from python_calamine import CalamineError
+except ImportError:  # optional: schnellerer Excel-Reader, sonst openpyxl
+    CalamineError = ImportError
+
 
 def normalize_column_names(df: pd.DataFrame) -> pd.DataFrame:
-    cols = {}
-    for c in df.columns:
-        cc = str(c).strip().lower()
-        cc = " ".join(cc.split())
-        cols[c] = cc
-    return df.rename(columns=cols)
+    return df.rename(columns=_normalized_column_map(tuple(df.columns)))
+
+
+@lru_cache(maxsize=64)
+def _normalized_column_map(columns: tuple) -> dict:
+    """Gecacht je Spaltensatz: dieselbe Vorlage wird bei jedem UI-Rerun erneut eingelesen."""
+    return {c: " ".join(str(c).strip().lower().split()) for c in columns}
+
+
+# Eindeutige ISO-Formate; alles andere (z.B. "07.01.2026") bleibt bei dateutil,
+# damit sich die Tag/Monat-Interpretation nicht ändert.
+_DATETIME_FORMATS = ("%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%dT%H:%M:%S")
 
 
 def parse_to_datetime(val, ref_date: date) -> datetime:
@@ -31,9 +44,18 @@ def parse_to_datetime(val, ref_date: date) -> datetime:
 
     s = str(val).strip()
     if ":" in s and len(s) <= 5:
-        t = dtparser.parse(s).time()
+        try:
+            t = datetime.strptime(s, "%H:%M").time()
+        except ValueError:
+            t = dtparser.parse(s).time()
         return datetime.combine(ref_date, t)
 
+    # Dokumentierte ISO-Formate direkt per strptime, dateutil nur für den Rest
+    for fmt in _DATETIME_FORMATS:
+        try:
+            return datetime.strptime(s, fmt)
+        except ValueError:
+            pass
     return dtparser.parse(s)
 
 
@@ -64,9 +86,12 @@ def load_einsender_excel(path: str, solve_cfg: SolveConfig) -> pd.DataFrame:
       - abholung 1 von, abholung 1 bis
       - abholung 2 von, abholung 2 bis
       - service_min (optional)
+
+    Gelesen wird mit calamine (Rust, deutlich schneller und sparsamer als openpyxl).
+    openpyxl dient als Fallback, wenn python-calamine fehlt, die Mappe nicht öffnen kann
+    oder Uhrzeiten ohne Vorzeichen liefert (siehe _read_workbook).
     """
-    df = pd.read_excel(path)
-    df = normalize_column_names(df)
+    df = normalize_column_names(_read_workbook(path))
 
     required = {
         "lat", "lon",
@@ -83,23 +108,100 @@ def load_einsender_excel(path: str, solve_cfg: SolveConfig) -> pd.DataFrame:
     if "service_min" not in df.columns:
         df["service_min"] = solve_cfg.default_service_min
 
-    df["tw1"] = df.apply(
-        lambda r: parse_optional_window(r["abholung 1 von"], r["abholung 1 bis"], solve_cfg.reference_date),
-        axis=1,
-    )
-    df["tw2"] = df.apply(
-        lambda r: parse_optional_window(r["abholung 2 von"], r["abholung 2 bis"], solve_cfg.reference_date),
-        axis=1,
-    )
+    df["tw1"] = parse_window_columns(df["abholung 1 von"], df["abholung 1 bis"], solve_cfg.reference_date)
+    df["tw2"] = parse_window_columns(df["abholung 2 von"], df["abholung 2 bis"], solve_cfg.reference_date)
 
     return df
 
 
+# Fensterspalten (von, bis) je Abholung
+_WINDOW_COLUMNS = (("abholung 1 von", "abholung 1 bis"), ("abholung 2 von", "abholung 2 bis"))
+
+
+def _read_workbook(path) -> pd.DataFrame:
+    """
+    Erstes Tabellenblatt mit calamine, sonst openpyxl.
+    Negative Excel-Zeiten (z.B. "-00:10") liefert calamine ohne Vorzeichen als Uhrzeit
+    (23:50), das Fenster endet dann vor seinem Start. Nur in diesem Fall wird die Mappe
+    erneut mit openpyxl gelesen, das solche Werte als Datum vor 1900 behält.
+    """
+    try:
+        df = pd.read_excel(path, engine="calamine")
+    except (ImportError, CalamineError):
+        pass
+    else:
+        if not _has_wrapped_time_window(normalize_column_names(df)):
+            return df
+    if hasattr(path, "seek"):
+        path.seek(0)
+    return pd.read_excel(path, engine="openpyxl")
+
+
+def _has_wrapped_time_window(df: pd.DataFrame) -> bool:
+    """Gibt es ein Fenster aus zwei reinen Uhrzeiten, dessen Ende vor dem Start liegt?"""
+    for von_col, bis_col in _WINDOW_COLUMNS:
+        if von_col not in df.columns or bis_col not in df.columns:
+            continue
+        for von, bis in zip(df[von_col], df[bis_col]):
+            if isinstance(von, time) and isinstance(bis, time) and bis < von:
+                return True
+    return False
+
+
+def parse_window_columns(von: pd.Series, bis: pd.Series, ref_date: date) -> pd.Series:
+    """
+    Spaltenweise Variante von parse_optional_window: Series mit (start_min, end_min) oder None.
+    Excel-Uhrzeiten und Datumswerte werden vektorisiert umgerechnet, nur sonstige
+    Werte (Text wie "08:00") laufen einzeln durch parse_to_datetime.
+    """
+    both = von.notna() & bis.notna()
+    s = _column_minutes(von[both], ref_date)
+    e = _column_minutes(bis[both], ref_date)
+
+    invalid = e < s
+    if invalid.any():
+        i = invalid.idxmax()
+        raise ValueError(f"Zeitfenster endet vor Start: {von[i]} - {bis[i]}")
+
+    by_row = dict(zip(s.index, zip(s.astype(int).tolist(), e.astype(int).tolist())))
+    return pd.Series([by_row.get(i) for i in von.index], index=von.index, dtype=object)
+
+
+def _column_minutes(col: pd.Series, ref_date: date) -> pd.Series:
+    """Minuten seit 00:00 des Referenzdatums je (nicht leerer) Zelle."""
+    minutes = pd.Series(np.nan, index=col.index)
+    filled = col.notna()
+
+    # Reine Uhrzeit (typische Excel-Zelle) → an ref_date gehängt
+    is_time = filled & col.map(lambda v: isinstance(v, time))
+    if is_time.any():
+        td = pd.to_timedelta(col[is_time].astype(str))
+        minutes[is_time] = td.dt.total_seconds() // 60
+
+    # Datum + Uhrzeit → Abstand zu 00:00 des Referenzdatums
+    is_dt = filled & col.map(lambda v: isinstance(v, datetime))
+    if is_dt.any():
+        delta = pd.to_datetime(col[is_dt]) - pd.Timestamp(ref_date)
+        minutes[is_dt] = delta.dt.total_seconds() // 60
+
+    # Sonstiges (Text etc.): Einzelwert-Parser
+    for i in col.index[filled & ~is_time & ~is_dt]:
+        minutes[i] = minutes_from_day_start(parse_to_datetime(col[i], ref_date), ref_date)
+
+    return minutes
+
+
 def depot_union_windows(depot: DepotConfig, solve_cfg: SolveConfig) -> list[tuple[int, int]]:
     """
     Liefert UNION der Depotfenster als sortierte, ggf. gemergte Liste.
     """
-    day = solve_cfg.reference_date
+    # Kopie, damit Aufrufer das gecachte Ergebnis nicht verändern können
+    return list(_depot_union_windows(depot, solve_cfg.reference_date))
+
+
+@lru_cache(maxsize=16)
+def _depot_union_windows(depot: DepotConfig, day: date) -> tuple[tuple[int, int], ...]:
+    """Gecachter Kern: Configs sind frozen/hashbar, gleiche Depotfenster werden nur einmal geparst."""
     wins = []
 
     for von, bis in [
@@ -115,7 +217,11 @@ def depot_union_windows(depot: DepotConfig, solve_cfg: SolveConfig) -> list[tupl
         raise ValueError("Depot hat kein gültiges Zeitfenster.")
 
     wins.sort()
+    return tuple(_merge_sorted(wins))
 
+
+def _merge_sorted(wins: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Verschmilzt sortierte Fenster, die sich überlappen oder direkt aneinander grenzen."""
     merged: list[tuple[int, int]] = []
     for s, e in wins:
         if not merged:
@@ -129,6 +235,13 @@ def depot_union_windows(depot: DepotConfig, solve_cfg: SolveConfig) -> list[tupl
     return merged
 
 
+# Spalten von node_meta (Reihenfolge = Tupel in build_nodes_mandatory_both_windows)
+_NODE_META_COLUMNS = [
+    "node_index", "einsender_id", "einsender_name", "adresse", "pickup_no",
+    "lat", "lon", "tw_start_min", "tw_end_min", "service_min",
+]
+
+
 def build_nodes_mandatory_both_windows(
         depot: DepotConfig,
         df: pd.DataFrame,
@@ -160,16 +273,34 @@ def build_nodes_mandatory_both_windows(
 
     meta_rows = []
 
-    for _, r in df.iterrows():
-        fallback_id   = str(r.get("id", r.get("name", ""))).strip()
-        einsender_str = str(r.get("einsender", fallback_id)).strip() or fallback_id
-        adresse_str   = str(r.get("adresse", "")).strip()
-
-        lat     = float(r["lat"])
-        lon     = float(r["lon"])
-        service = int(r.get("service_min", solve_cfg.default_service_min))
-
-        tws = [(1, r["tw1"]), (2, r["tw2"])]
+    # Spalten einmal als Listen ziehen statt jede Zeile als Series zu boxen (iterrows)
+    n_rows = len(df)
+
+    def _column(name: str, default) -> list:
+        return df[name].tolist() if name in df.columns else [default] * n_rows
+
+    has_einsender = "einsender" in df.columns
+    ids           = _column("id", None) if "id" in df.columns else _column("name", "")
+
+    for raw_id, raw_einsender, raw_adresse, raw_lat, raw_lon, raw_service, tw1, tw2 in zip(
+            ids,
+            _column("einsender", None),
+            _column("adresse", ""),
+            df["lat"].tolist(),
+            df["lon"].tolist(),
+            _column("service_min", solve_cfg.default_service_min),
+            df["tw1"].tolist(),
+            df["tw2"].tolist(),
+    ):
+        fallback_id   = str(raw_id).strip()
+        einsender_str = (str(raw_einsender).strip() if has_einsender else fallback_id) or fallback_id
+        adresse_str   = str(raw_adresse).strip()
+
+        lat     = float(raw_lat)
+        lon     = float(raw_lon)
+        service = int(raw_service)
+
+        tws = [(1, tw1), (2, tw2)]
         active_pickups = [(no, tw) for no, tw in tws if tw is not None]
 
         for pickup_no, tw in active_pickups:
@@ -187,18 +318,18 @@ def build_nodes_mandatory_both_windows(
             node_addresses.append(adresse_str)
 
             node_index = len(coords) - 1
-            meta_rows.append({
-                "node_index":     node_index,
-                "einsender_id":   fallback_id,
-                "einsender_name": einsender_str,
-                "adresse":        adresse_str,
-                "pickup_no":      pickup_no,
-                "lat":            lat,
-                "lon":            lon,
-                "tw_start_min":   tw[0],
-                "tw_end_min":     tw[1],
-                "service_min":    service,
-            })
-
-    meta_df = pd.DataFrame(meta_rows)
+            meta_rows.append((
+                node_index, fallback_id, einsender_str, adresse_str, pickup_no,
+                lat, lon, tw[0], tw[1], service,
+            ))
+
+    meta_df = pd.DataFrame.from_records(meta_rows, columns=_NODE_META_COLUMNS)
     return coords, node_tws, service_mins, labels, node_senders, node_addresses, meta_df
+
+
+def node_tw_array(node_tws: list[tuple[int, int] | None]) -> np.ndarray:
+    """
+    Zeitfenster als zusammenhängendes int32-Array (N×2) für vektorisierte Checks.
+    Nodes ohne Fenster (Depot) bekommen (-1, -1).
+    """
+    return np.asarray([tw if tw is not None else (-1, -1) for tw in node_tws], dtype=np.int32).reshape(-1, 2)
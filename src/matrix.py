@@ -1,24 +1,113 @@
 from __future__ import annotations
 import os
 import json
+import hashlib
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from pathlib import Path
+
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:  # optional: schnellerer JSON-Parser, sonst requests/json
+    orjson = None
 
 # Maximale Anzahl *einzigartiger* Koordinaten pro OSRM-Request.
 # Off-diagonal-Blöcke enthalten src + dst = 2 × CHUNK_SIZE Coords in der URL.
 # Öffentlicher OSRM-Server limitiert die URL auf ~2000 Zeichen.
 # Bei 25 sind das max. 50 Coords → ~1500 Zeichen, sicher darunter.
+# Eigene OSRM-Server (größere max-table-size) können per OSRM_CHUNK_SIZE mehr erlauben.
 _OSRM_CHUNK_SIZE = 25
 
+# Mit OSRM_METHOD=POST stehen die Koordinaten im Body, das URL-Limit entfällt
+_OSRM_CHUNK_SIZE_POST = 100
+
+# Per OSRM_TABLE_URL auf einen eigenen Server umstellbar
+_OSRM_TABLE_URL = "https://router.project-osrm.org/table/v1/driving"
+
+# Anzahl gleichzeitiger Block-Requests (OSRM ist netzwerk-, nicht CPU-gebunden).
+# Per OSRM_PARALLELISM überschreibbar: "auto" (Default), 1 = sequentiell, N = N Threads.
+_OSRM_MAX_PARALLEL = 4
+
+# Eine Session für alle Requests: Keep-Alive statt neuem TCP/TLS-Handshake je Block.
+# Überlastungsantworten des öffentlichen OSRM-Servers (429/5xx) werden mit Backoff wiederholt.
+# allowed_methods=None: auch POST (OSRM_METHOD=POST) – OSRM-Table-Abfragen sind rein lesend.
+_RETRY = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 502, 503, 504], allowed_methods=None,
+               raise_on_status=False)
+_SESSION = requests.Session()
+_SESSION_POOL_SIZE = 0
+
+# Google Routes rechnet jede verarbeitete Anfrage ab: eigene Session, deren Retry POST
+# nicht erneut sendet (nur Verbindungsfehler, bevor die Anfrage beim Server ankam).
+_GOOGLE_SESSION = requests.Session()
+_GOOGLE_SESSION.mount("https://", HTTPAdapter(max_retries=_RETRY.new(allowed_methods=Retry.DEFAULT_ALLOWED_METHODS)))
+
+# Matrizen werden als int32-Arrays gehalten: Minuten (< 10**6) und Meter (< 10**9,
+# inkl. Google-Fehlerwert) passen verlustfrei, halber Speicher ggü. int64/float64.
+_MATRIX_DTYPE = np.int32
+
+# Die Zeitmatrix wird nach dem Aufbau auf int16 verkleinert, wenn alle Werte passen
+# (±32767 min ≈ 22 Tage). Google-Fehlerwerte (10**6) halten sie bei int32.
+_TIME_MATRIX_COMPACT_DTYPE = np.int16
+
+# Matrix-Cache: gleiche Koordinaten (auf 6 Nachkommastellen ≈ 11 cm gerundet)
+# liefern dieselbe Matrix. Prozess-lokal im Dict, prozessübergreifend als .npy (memory-mapped).
+_MATRIX_CACHE: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+_MATRIX_CACHE_DIR = Path(".cache")
+
+# OSRM-Paar-Cache: Fahrzeit/Distanz je Koordinatenpaar über Läufe hinweg. Trifft anders
+# als der Matrix-Cache auch, wenn nur einzelne Einsender dazukommen – dann werden nur
+# die Blöcke mit unbekannten Paaren neu abgefragt. SQLite-Tabelle je Paar (Koordinaten
+# in Mikrograd): Lookup per Join, neue Paare werden nur angehängt statt alles neu zu
+# schreiben; Sperren zwischen Threads/Prozessen (CLI + Streamlit) übernimmt SQLite.
+# Eine Datei je OSRM-Endpunkt: anderer Server/anderes Profil → andere Fahrzeiten.
+_OSRM_PAIR_CACHE_PATTERN = "osrm_pairs_{url_hash}.sqlite"
+_PAIR_UNKNOWN = -1
+
+
+def as_matrix(m) -> np.ndarray:
+    """
+    Matrix als NumPy-Array – ein bereits vorhandenes Array wird unverändert (ohne Kopie)
+    durchgereicht. So zahlen Prechecks, Statistik und Export die O(N²)-Konvertierung
+    nicht jeweils erneut, wenn die Pipeline das Array aus build_matrices weitergibt.
+    """
+    return m if isinstance(m, np.ndarray) else np.asarray(m)
+
+
+def _osrm_parallelism() -> int:
+    raw = os.getenv("OSRM_PARALLELISM", "auto").strip().lower()
+    if raw in ("", "auto"):
+        return _OSRM_MAX_PARALLEL
+    return max(1, int(raw))
+
+
+def _ensure_session_pool(workers: int) -> None:
+    """Connection-Pool mindestens so groß wie die Thread-Anzahl, sonst verwirft urllib3 Verbindungen."""
+    global _SESSION_POOL_SIZE
+    if workers > _SESSION_POOL_SIZE:
+        # http:// für eigene OSRM-Server (OSRM_TABLE_URL=http://localhost:5000/…), https:// für die übrigen
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=_RETRY)
+        _SESSION.mount("http://", adapter)
+        _SESSION.mount("https://", adapter)
+        _SESSION_POOL_SIZE = workers
+
+
+_ensure_session_pool(_OSRM_MAX_PARALLEL)
+
+
+def _response_json(r: requests.Response):
+    """Antwort-JSON parsen – mit orjson deutlich schneller bei großen Matrix-Antworten."""
+    return orjson.loads(r.content) if orjson is not None else r.json()
+
 
 def _osrm_full_table(coords: list[tuple[float, float]]) -> tuple[list[list], list[list]]:
     """Vollständige N×N-Matrix – OHNE sources/destinations (OSRM-Default = alles)."""
-    coord_str = ";".join(f"{lon},{lat}" for lat, lon in coords)
-    url = f"https://router.project-osrm.org/table/v1/driving/{coord_str}"
-    params = {"annotations": "duration,distance"}
-    r = requests.get(url, params=params, timeout=60)
-    r.raise_for_status()
-    data = r.json()
-    return data["durations"], data["distances"]
+    return _osrm_table_request(coords)
 
 
 def _osrm_sub_table(
@@ -30,91 +119,277 @@ def _osrm_sub_table(
     Teilmatrix-Request mit expliziten sources/destinations.
     Dimension Rückgabe: len(src_local) × len(dst_local).
     """
-    coord_str = ";".join(f"{lon},{lat}" for lat, lon in sub_coords)
-    url = f"https://router.project-osrm.org/table/v1/driving/{coord_str}"
-    params = {
-        "annotations": "duration,distance",
-        "sources":      ",".join(map(str, src_local)),
-        "destinations": ",".join(map(str, dst_local)),
-    }
-    r = requests.get(url, params=params, timeout=60)
+    return _osrm_table_request(sub_coords, src_local, dst_local)
+
+
+def _osrm_table_request(
+        coords: list[tuple[float, float]],
+        src_local: list[int] | None = None,
+        dst_local: list[int] | None = None,
+) -> tuple[list[list], list[list]]:
+    """
+    GET (Default, Koordinaten in der URL) oder – bei OSRM_METHOD=POST – Koordinaten als
+    JSON-Body. POST umgeht das URL-Limit, wird aber vom öffentlichen Server nicht unterstützt.
+    """
+    url = _osrm_table_url()
+
+    if _osrm_use_post():
+        body = {"coordinates": [[lon, lat] for lat, lon in coords], "annotations": ["duration", "distance"]}
+        if src_local is not None:
+            body["sources"] = src_local
+        if dst_local is not None:
+            body["destinations"] = dst_local
+        r = _SESSION.post(url, json=body, timeout=60)
+    else:
+        coord_str = ";".join(f"{lon},{lat}" for lat, lon in coords)
+        params = {"annotations": "duration,distance"}
+        if src_local is not None:
+            params["sources"] = ",".join(map(str, src_local))
+        if dst_local is not None:
+            params["destinations"] = ",".join(map(str, dst_local))
+        r = _SESSION.get(f"{url}/{coord_str}", params=params, timeout=60)
+
     r.raise_for_status()
-    data = r.json()
+    data = _response_json(r)
     return data["durations"], data["distances"]
 
 
-def build_matrices_osrm(coords: list[tuple[float, float]]) -> tuple[list[list[int]], list[list[int]]]:
-    n = len(coords)
+def _osrm_table_url() -> str:
+    return os.getenv("OSRM_TABLE_URL", _OSRM_TABLE_URL)
 
-    # ── Schritt 1: Koordinaten deduplizieren ──────────────────────────
-    # Viele Einsender haben identische lat/lon (gleicher Standort, mehrere Abholungen).
-    # Wir arbeiten nur mit einzigartigen Koordinaten und expandieren danach.
+
+def _osrm_use_post() -> bool:
+    return os.getenv("OSRM_METHOD", "GET").upper() == "POST"
+
+
+def _osrm_block(
+        unique_coords: list[tuple[float, float]],
+        src_chunk: list[int],
+        dst_chunk: list[int],
+) -> tuple[list[list], list[list]]:
+    """Ein Block der Matrix: Zeilen src_chunk × Spalten dst_chunk (Indizes in unique_coords)."""
+    # Lokale Koordinatenliste: nur src + dst (dedupliziert)
+    seen: dict[int, int] = {}
+    combined: list[int] = []
+    for uid in src_chunk + dst_chunk:
+        if uid not in seen:
+            seen[uid] = len(combined)
+            combined.append(uid)
+
+    sub_coords = [unique_coords[i] for i in combined]
+    src_local  = [seen[i] for i in src_chunk]
+    dst_local  = [seen[i] for i in dst_chunk]
+
+    # Wenn src + dst alle Coords abdecken → kein sources/destinations (→ 400)
+    full_range = list(range(len(sub_coords)))
+    if src_local == full_range and dst_local == full_range:
+        return _osrm_full_table(sub_coords)
+    return _osrm_sub_table(sub_coords, src_local, dst_local)
+
+
+def _dedupe_coords(coords: list[tuple[float, float]]) -> tuple[list[tuple[float, float]], list[int]]:
+    """
+    Viele Einsender haben identische lat/lon (gleicher Standort, mehrere Abholungen).
+    Liefert (unique_coords, node_to_uid): Provider rechnen nur auf den einzigartigen
+    Koordinaten, die Node-Matrix entsteht danach per np.ix_(node_to_uid, node_to_uid).
+    """
     unique_coords: list[tuple[float, float]] = []
     coord_to_uid:  dict[tuple[float, float], int] = {}
     node_to_uid:   list[int] = []
 
+    # Schlüssel auf 6 Nachkommastellen (≈ 11 cm) gerundet wie bei den Caches: Float-Rauschen
+    # aus unterschiedlichen Importwegen soll denselben Standort nicht doppelt abfragen
     for coord in coords:
-        if coord not in coord_to_uid:
-            coord_to_uid[coord] = len(unique_coords)
+        key = _coord_key(coord)
+        if key not in coord_to_uid:
+            coord_to_uid[key] = len(unique_coords)
             unique_coords.append(coord)
-        node_to_uid.append(coord_to_uid[coord])
+        node_to_uid.append(coord_to_uid[key])
+
+    return unique_coords, node_to_uid
+
+
+def _expand_to_nodes(uid_matrix: np.ndarray, node_to_uid: list[int]) -> np.ndarray:
+    """
+    M×M-Matrix der einzigartigen Koordinaten → N×N-Node-Matrix (Solver braucht je Node
+    eine Zeile). Ohne doppelte Koordinaten ist node_to_uid die Identität (UIDs werden in
+    Reihenfolge des ersten Auftretens vergeben) → Array ohne Kopie zurückgeben.
+    """
+    if len(node_to_uid) == len(uid_matrix):
+        return uid_matrix
+    return uid_matrix[np.ix_(node_to_uid, node_to_uid)]
+
+
+def _osrm_to_int(raw: list[list], divisor: int = 1) -> np.ndarray:
+    """OSRM-Tabelle (Sekunden bzw. Meter, null = nicht routbar) → gerundetes int32-Array, null → 0."""
+    arr = np.asarray(raw, dtype=np.float64) / divisor
+    return np.where(np.isnan(arr), 0, np.rint(arr)).astype(_MATRIX_DTYPE)
+
+
+def _coord_key(coord: tuple[float, float]) -> tuple[float, float]:
+    lat, lon = coord
+    return round(lat, 6), round(lon, 6)
+
+
+def _coord_micro(coord: tuple[float, float]) -> tuple[int, int]:
+    """Koordinate als ganze Mikrograd – gleiche Rundung wie _coord_key, aber als SQLite-Integer."""
+    lat, lon = coord
+    return round(lat * 1_000_000), round(lon * 1_000_000)
+
+
+def _pair_cache_path() -> Path:
+    url_hash = hashlib.sha1(_osrm_table_url().encode("utf-8")).hexdigest()[:16]
+    return _MATRIX_CACHE_DIR / _OSRM_PAIR_CACHE_PATTERN.format(url_hash=url_hash)
+
+
+def _pair_cache_connect() -> sqlite3.Connection:
+    _MATRIX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(_pair_cache_path(), timeout=30)
+    con.execute(
+        "CREATE TABLE IF NOT EXISTS pairs ("
+        " src_lat INTEGER, src_lon INTEGER, dst_lat INTEGER, dst_lon INTEGER,"
+        " time INTEGER NOT NULL, dist INTEGER NOT NULL,"
+        " PRIMARY KEY (src_lat, src_lon, dst_lat, dst_lon)"
+        ") WITHOUT ROWID"
+    )
+    return con
+
+
+def _pair_cache_lookup(unique_coords: list[tuple[float, float]]) -> tuple[np.ndarray, np.ndarray]:
+    """uid_time/uid_dist aus dem Paar-Cache vorbelegen; unbekannte Paare = _PAIR_UNKNOWN."""
+    m = len(unique_coords)
+    uid_time = np.full((m, m), _PAIR_UNKNOWN, dtype=_MATRIX_DTYPE)
+    uid_dist = np.full((m, m), _PAIR_UNKNOWN, dtype=_MATRIX_DTYPE)
+
+    # Cache ist nur Beschleunigung – nicht lesbar heißt: alles unbekannt
+    try:
+        with closing(_pair_cache_connect()) as con:
+            con.execute("CREATE TEMP TABLE q (uid INTEGER PRIMARY KEY, lat INTEGER, lon INTEGER)")
+            con.executemany("INSERT INTO q VALUES (?, ?, ?)",
+                            [(uid, *_coord_micro(c)) for uid, c in enumerate(unique_coords)])
+            rows = con.execute(
+                "SELECT a.uid, b.uid, p.time, p.dist FROM q a CROSS JOIN q b JOIN pairs p"
+                " ON p.src_lat = a.lat AND p.src_lon = a.lon AND p.dst_lat = b.lat AND p.dst_lon = b.lon"
+            ).fetchall()
+    except (OSError, sqlite3.Error):
+        return uid_time, uid_dist
+
+    if rows:
+        found = np.asarray(rows, dtype=np.int64)
+        uid_time[found[:, 0], found[:, 1]] = found[:, 2]
+        uid_dist[found[:, 0], found[:, 1]] = found[:, 3]
+    return uid_time, uid_dist
+
+
+def _pair_cache_store(
+        unique_coords: list[tuple[float, float]],
+        uid_time: np.ndarray,
+        uid_dist: np.ndarray,
+        fetched: np.ndarray,
+) -> None:
+    """Nur die neu abgefragten Paare (Maske `fetched`) eintragen."""
+    micro = [_coord_micro(c) for c in unique_coords]
+    src, dst = np.nonzero(fetched)
+    rows = [
+        (*micro[i], *micro[j], t, d)
+        for i, j, t, d in zip(src.tolist(), dst.tolist(), uid_time[src, dst].tolist(), uid_dist[src, dst].tolist())
+    ]
+
+    # Wie beim Matrix-Cache: Schreibfehler dürfen die Berechnung nicht abbrechen
+    try:
+        with closing(_pair_cache_connect()) as con, con:
+            con.executemany("INSERT OR REPLACE INTO pairs VALUES (?, ?, ?, ?, ?, ?)", rows)
+    except (OSError, sqlite3.Error):
+        pass
+
+
+def build_matrices_osrm(coords: list[tuple[float, float]]) -> tuple[np.ndarray, np.ndarray]:
+    # ── Schritt 1: Koordinaten deduplizieren ──────────────────────────
+    unique_coords, node_to_uid = _dedupe_coords(coords)
 
     m = len(unique_coords)
+    default_chunk = _OSRM_CHUNK_SIZE_POST if _osrm_use_post() else _OSRM_CHUNK_SIZE
+    chunk_size = max(1, int(os.getenv("OSRM_CHUNK_SIZE", default_chunk)))
 
     # ── Schritt 2: Matrix für einzigartige Koordinaten berechnen ──────
-    if m <= _OSRM_CHUNK_SIZE:
+    # Bekannte Paare aus dem Paar-Cache, abgefragt werden nur Blöcke mit Lücken
+    uid_time, uid_dist = _pair_cache_lookup(unique_coords)
+    missing = uid_time < 0
+    strips    = os.getenv("OSRM_LAYOUT", "blocks").lower() == "strips"
+    if strips and not _osrm_use_post():
+        # Jeder Streifen enthält alle Koordinaten – per GET sprengt das das URL-Limit
+        raise RuntimeError("OSRM_LAYOUT=strips erfordert OSRM_METHOD=POST (alle Koordinaten je Request).")
+    symmetric = os.getenv("OSRM_ASSUME_SYMMETRIC", "0") == "1" and not strips
+
+    if not missing.any():
+        pass
+    elif m <= chunk_size:
         # Kleiner Input: ein einziger Request ohne sources/destinations
         dur_raw, dist_raw = _osrm_full_table(unique_coords)
-        uid_time: list[list[int]] = [[0 if d is None else int(round(d / 60)) for d in row] for row in dur_raw]
-        uid_dist: list[list[int]] = [[0 if d is None else int(round(d))       for d in row] for row in dist_raw]
+        uid_time = _osrm_to_int(dur_raw, 60)
+        uid_dist = _osrm_to_int(dist_raw)
     else:
         # Großer Input: Block-Chunking auf den einzigartigen Koordinaten.
         # Off-diagonal-Blöcke enthalten max. 2 × CHUNK_SIZE Coords in der URL.
-        uid_time = [[0] * m for _ in range(m)]
-        uid_dist = [[0] * m for _ in range(m)]
-
-        chunks = [list(range(i, min(i + _OSRM_CHUNK_SIZE, m))) for i in range(0, m, _OSRM_CHUNK_SIZE)]
-
-        for src_chunk in chunks:
-            for dst_chunk in chunks:
-                # Lokale Koordinatenliste: nur src + dst (dedupliziert)
-                seen: dict[int, int] = {}
-                combined: list[int] = []
-                for uid in src_chunk + dst_chunk:
-                    if uid not in seen:
-                        seen[uid] = len(combined)
-                        combined.append(uid)
-
-                sub_coords = [unique_coords[i] for i in combined]
-                src_local  = [seen[i] for i in src_chunk]
-                dst_local  = [seen[i] for i in dst_chunk]
-
-                # Wenn src + dst alle Coords abdecken → kein sources/destinations (→ 400)
-                full_range = list(range(len(sub_coords)))
-                if src_local == full_range and dst_local == full_range:
-                    dur_raw, dist_raw = _osrm_full_table(sub_coords)
-                else:
-                    dur_raw, dist_raw = _osrm_sub_table(sub_coords, src_local, dst_local)
-
-                for i, src_uid in enumerate(src_chunk):
-                    for j, dst_uid in enumerate(dst_chunk):
-                        d  = dur_raw[i][j]
-                        dm = dist_raw[i][j]
-                        uid_time[src_uid][dst_uid] = 0 if d  is None else int(round(d  / 60))
-                        uid_dist[src_uid][dst_uid] = 0 if dm is None else int(round(dm))
+        chunks = [list(range(i, min(i + chunk_size, m))) for i in range(0, m, chunk_size)]
+        spans  = [slice(chunk[0], chunk[-1] + 1) for chunk in chunks]   # zusammenhängende Bereiche
 
-    # ── Schritt 3: Auf vollständige Node-Matrix expandieren ───────────
-    time_matrix_min = [[uid_time[node_to_uid[i]][node_to_uid[j]] for j in range(n)] for i in range(n)]
-    dist_matrix_m   = [[uid_dist[node_to_uid[i]][node_to_uid[j]] for j in range(n)] for i in range(n)]
+        # Opt-in: Fahrzeiten als symmetrisch annehmen → nur Blöcke auf/über der Diagonalen
+        # abfragen und den Rest transponiert spiegeln. Halbiert die Requests, ignoriert aber
+        # Richtungsunterschiede (Einbahnstraßen, Autobahnauffahrten).
+        def has_gap(si: int, di: int) -> bool:
+            return bool(missing[spans[si], spans[di]].any())
+
+        if strips:
+            # Opt-in (OSRM_LAYOUT=strips): Streifen statt Blöcke – alle Koordinaten als
+            # sources, je Request ein Ziel-Chunk. M/CHUNK statt (M/CHUNK)² Requests, jeder
+            # enthält aber alle M Koordinaten → nur mit POST und max-table-size ≥ M.
+            blocks = [(None, di) for di in range(len(chunks)) if missing[:, spans[di]].any()]
+        else:
+            blocks = [
+                (si, di)
+                for si in range(len(chunks))
+                for di in range(len(chunks))
+                if (si <= di and (has_gap(si, di) or has_gap(di, si)) if symmetric else has_gap(si, di))
+            ]
 
-    return time_matrix_min, dist_matrix_m
+        def fetch(block: tuple[int | None, int]) -> tuple[list[list], list[list]]:
+            si, di = block
+            if si is None:
+                return _osrm_table_request(unique_coords, None, chunks[di])
+            return _osrm_block(unique_coords, chunks[si], chunks[di])
 
+        # Blöcke parallel abfragen; Ergebnisse kommen in Block-Reihenfolge zurück
+        workers = min(_osrm_parallelism(), len(blocks))
+        _ensure_session_pool(workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(fetch, blocks)
 
-def build_matrices_google_routes(coords: list[tuple[float, float]], api_key: str) -> tuple[list[list[int]], list[list[int]]]:
+            for (si, di), (dur_raw, dist_raw) in zip(blocks, results):
+                rows = slice(None) if si is None else spans[si]
+                cols = spans[di]
+                uid_time[rows, cols] = _osrm_to_int(dur_raw, 60)
+                uid_dist[rows, cols] = _osrm_to_int(dist_raw)
+                if symmetric and si != di:
+                    uid_time[cols, rows] = uid_time[rows, cols].T
+                    uid_dist[cols, rows] = uid_dist[rows, cols].T
+
+    # Gespiegelte Werte sind Näherungen und kommen nicht in den (richtungsgenauen) Paar-Cache
+    if missing.any() and not symmetric:
+        _pair_cache_store(unique_coords, uid_time, uid_dist, missing)
+
+    # ── Schritt 3: Auf vollständige Node-Matrix expandieren ───────────
+    return _expand_to_nodes(uid_time, node_to_uid), _expand_to_nodes(uid_dist, node_to_uid)
+
+
+def build_matrices_google_routes(coords: list[tuple[float, float]], api_key: str) -> tuple[np.ndarray, np.ndarray]:
     endpoint = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
 
-    origins      = [{"waypoint": {"location": {"latLng": {"latitude": lat, "longitude": lon}}}} for lat, lon in coords]
-    destinations = [{"waypoint": {"location": {"latLng": {"latitude": lat, "longitude": lon}}}} for lat, lon in coords]
+    # Nur einzigartige Koordinaten anfragen (Google rechnet je Element ab)
+    unique_coords, node_to_uid = _dedupe_coords(coords)
+
+    origins      = [{"waypoint": {"location": {"latLng": {"latitude": lat, "longitude": lon}}}} for lat, lon in unique_coords]
+    destinations = [{"waypoint": {"location": {"latLng": {"latitude": lat, "longitude": lon}}}} for lat, lon in unique_coords]
 
     body    = {"origins": origins, "destinations": destinations, "travelMode": "DRIVE"}
     headers = {
@@ -123,35 +398,114 @@ def build_matrices_google_routes(coords: list[tuple[float, float]], api_key: str
         "X-Goog-FieldMask": "originIndex,destinationIndex,duration,distanceMeters,status",
     }
 
-    r = requests.post(endpoint, headers=headers, data=json.dumps(body), timeout=120)
+    r = _GOOGLE_SESSION.post(endpoint, headers=headers, data=json.dumps(body), timeout=120)
     r.raise_for_status()
-    elements = r.json()
+    elements = _response_json(r)
+
+    m = len(unique_coords)
+    uid_time = np.zeros((m, m), dtype=_MATRIX_DTYPE)
+    uid_dist = np.zeros((m, m), dtype=_MATRIX_DTYPE)
+
+    # Elemente einmal in Spalten zerlegen, Umrechnung + Eintragen dann vektorisiert.
+    # Protobuf-JSON lässt Felder mit Wert 0 weg → Default 0 (nicht None).
+    oi      = np.asarray([el.get("originIndex", 0)      for el in elements], dtype=np.intp)
+    di      = np.asarray([el.get("destinationIndex", 0) for el in elements], dtype=np.intp)
+    ok      = np.asarray([el.get("status", {}).get("code", 0) == 0 for el in elements], dtype=bool)
+    seconds = np.asarray([_google_seconds(el.get("duration")) for el in elements], dtype=np.float64)
+    meters  = np.asarray([el.get("distanceMeters", 0) for el in elements], dtype=np.int64)
+
+    # Nicht routbar (status != OK) → "unendlich"-Werte, die die Prechecks erkennen
+    uid_time[oi, di] = np.where(ok, np.rint(seconds / 60), 10**6)
+    uid_dist[oi, di] = np.where(ok, meters, 10**9)
 
-    n = len(coords)
-    time_matrix_min = [[0] * n for _ in range(n)]
-    dist_matrix_m   = [[0] * n for _ in range(n)]
+    # Auf vollständige Node-Matrix expandieren
+    return _expand_to_nodes(uid_time, node_to_uid), _expand_to_nodes(uid_dist, node_to_uid)
 
-    for el in elements:
-        oi     = el.get("originIndex")
-        di     = el.get("destinationIndex")
-        status = el.get("status", {})
-        code   = status.get("code", 0)
 
-        if code != 0:
-            time_matrix_min[oi][di] = 10**6
-            dist_matrix_m  [oi][di] = 10**9
-            continue
+def _google_seconds(dur) -> int:
+    """Dauer der Routes API, meist als "123s"-String."""
+    return int(float(dur[:-1])) if isinstance(dur, str) and dur.endswith("s") else int(float(dur or 0))
 
-        dur     = el.get("duration")  # oft "123s"
-        seconds = int(float(dur[:-1])) if isinstance(dur, str) and dur.endswith("s") else int(float(dur or 0))
-        time_matrix_min[oi][di] = int(round(seconds / 60))
-        dist_matrix_m  [oi][di] = int(el.get("distanceMeters", 0))
 
-    return time_matrix_min, dist_matrix_m
+def _matrix_cache_key(provider: str, coords: list[tuple[float, float]]) -> str:
+    coords_tuple = tuple((round(lat, 6), round(lon, 6)) for lat, lon in coords)
+    return hashlib.sha1(repr((provider, coords_tuple)).encode("utf-8")).hexdigest()
 
 
-def build_matrices(coords: list[tuple[float, float]]) -> tuple[list[list[int]], list[list[int]]]:
+_MATRIX_CACHE_NAMES = ("time", "dist")
+
+
+def _matrix_cache_path(key: str, name: str) -> Path:
+    return _MATRIX_CACHE_DIR / f"matrix_{key}_{name}.npy"
+
+
+def _load_cached_matrices(key: str) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    .npy-Dateien schreibgeschützt memory-mapped öffnen: keine Kopie beim Laden, und
+    Prozesse mit derselben Matrix (Streamlit-Worker, CLI-Läufe) teilen sich die Seiten.
+    """
+    try:
+        # .view(np.ndarray): gleiche gemappten Seiten, aber ohne memmap-Unterklasse nach außen
+        return tuple(
+            np.load(_matrix_cache_path(key, name), mmap_mode="r").view(np.ndarray) for name in _MATRIX_CACHE_NAMES
+        )
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached_matrices(key: str, matrices: tuple[np.ndarray, np.ndarray]) -> None:
+    # Cache ist nur Beschleunigung – Schreibfehler dürfen die Berechnung nicht abbrechen.
+    # Erst in eine Temp-Datei, dann umbenennen: parallele Leser sehen nie eine halbe Datei.
+    try:
+        _MATRIX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for name, m in zip(_MATRIX_CACHE_NAMES, matrices):
+            path = _matrix_cache_path(key, name)
+            tmp  = path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, m)
+            os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def build_matrices(coords: list[tuple[float, float]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Liefert (time_matrix_min, dist_matrix_m) als N×N-Arrays: Distanzen int32,
+    Zeiten int16 (wenn alle Werte passen, sonst int32).
+    """
     provider = os.getenv("MATRIX_PROVIDER", "OSRM").upper()
+    # OSRM je Endpunkt (Server/Profil) und gespiegelte (symmetrische) Matrizen getrennt cachen
+    cache_provider = provider
+    if provider == "OSRM":
+        cache_provider += "-SYM" if os.getenv("OSRM_ASSUME_SYMMETRIC", "0") == "1" else ""
+        cache_provider += "@" + _osrm_table_url()
+    key = _matrix_cache_key(cache_provider, coords)
+
+    matrices = _MATRIX_CACHE.get(key) or _load_cached_matrices(key)
+    if matrices is None:
+        # Einmalig casten/verkleinern – Cache-Dateien enthalten schon die fertigen Arrays
+        time_matrix_min, dist_matrix_m = (
+            np.asarray(m, dtype=_MATRIX_DTYPE) for m in _build_matrices_uncached(provider, coords)
+        )
+        matrices = (_compact_time_matrix(time_matrix_min), dist_matrix_m)
+        _store_cached_matrices(key, matrices)
+
+    _MATRIX_CACHE[key] = matrices
+    return matrices
+
+
+def _compact_time_matrix(time_matrix_min: np.ndarray) -> np.ndarray:
+    """Halbe Speicher-/Bandbreite für Prechecks, Statistik und Export; Rechnungen casten selbst hoch."""
+    info = np.iinfo(_TIME_MATRIX_COMPACT_DTYPE)
+    if time_matrix_min.size and (time_matrix_min.min() < info.min or time_matrix_min.max() > info.max):
+        return time_matrix_min
+    return time_matrix_min.astype(_TIME_MATRIX_COMPACT_DTYPE)
+
+
+def _build_matrices_uncached(
+        provider: str,
+        coords: list[tuple[float, float]],
+) -> tuple[np.ndarray, np.ndarray]:
     if provider == "GOOGLE":
         api_key = os.getenv("GOOGLE_MAPS_API_KEY")
         if not api_key:
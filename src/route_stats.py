@@ -2,11 +2,15 @@
 
 from __future__ import annotations
 
+import numpy as np
+
+from .matrix import as_matrix
+
 
 def compute_route_totals(
         routes: list[list[tuple]],
-        time_matrix_min: list[list[int]],
-        dist_matrix_m: list[list[int]],
+        time_matrix_min: np.ndarray,
+        dist_matrix_m: np.ndarray,
         node_service_mins: list[int],
 ) -> list[dict]:
     """
@@ -21,46 +25,41 @@ def compute_route_totals(
         total_service_min int   – Servicezeit in Minuten
         total_time_min    int   – Gesamtzeit (Fahrt + Warten + Service)
     """
-    totals: list[dict] = []
-
-    for r_idx, route in enumerate(routes, start=1):
-        if len(route) < 2:
-            continue
-
-        drive_sum = 0
-        wait_sum = 0
-        service_sum = 0
-        dist_sum_m = 0
-        n_stops = 0
+    tmat = as_matrix(time_matrix_min)
+    dmat = as_matrix(dist_matrix_m)
+    service_mins = np.asarray(node_service_mins, dtype=np.int64)
 
-        for seq, step in enumerate(route):
-            node = step[0]
-            tmin = int(step[1])
+    kept = [(r_idx, route) for r_idx, route in enumerate(routes, start=1) if len(route) >= 2]
+    if not kept:
+        return []
 
-            if seq == 0:
-                continue  # Depot-Start – kein Segment
+    # Alle Routen flach hintereinander; Segment = (vorheriger Stopp → Stopp) innerhalb
+    # derselben Route, Routenanfänge haben keinen Vorgänger
+    lengths = np.asarray([len(route) for _, route in kept])
+    starts  = np.cumsum(lengths) - lengths
+    nodes   = np.asarray([step[0] for _, route in kept for step in route], dtype=np.intp)
+    tmins   = np.asarray([step[1] for _, route in kept for step in route]).astype(np.int64)
 
-            prev_step = route[seq - 1]
-            prev_node = prev_step[0]
-            prev_tmin = int(prev_step[1])
+    has_prev = np.ones(len(nodes), dtype=bool)
+    has_prev[starts] = False
+    cur_pos  = np.flatnonzero(has_prev)
+    prev, cur = nodes[cur_pos - 1], nodes[cur_pos]
+    is_stop  = cur != 0
 
-            travel = int(time_matrix_min[prev_node][node])
-            dist_m = int(dist_matrix_m[prev_node][node])
-            service = int(node_service_mins[node]) if node != 0 else 0
+    travel  = tmat[prev, cur].astype(np.int64)
+    dist_m  = dmat[prev, cur].astype(np.int64)
+    service = np.where(is_stop, service_mins[cur], 0)
+    wait    = np.maximum(tmins[cur_pos] - tmins[cur_pos - 1] - travel - service, 0)
 
-            wait = tmin - prev_tmin - travel - service
-            if wait < 0:
-                wait = 0
+    # Je Route len-1 Segmente, zusammenhängend → Summen per reduceat
+    seg_starts = starts - np.arange(len(kept))
+    drive_sums, wait_sums, service_sums, dist_sums, stop_counts = (
+        np.add.reduceat(arr, seg_starts).tolist()
+        for arr in (travel, wait, service, dist_m, is_stop.astype(np.int64))
+    )
 
-            drive_sum += travel
-            wait_sum += wait
-            service_sum += service
-            dist_sum_m += dist_m
-
-            if node != 0:
-                n_stops += 1
-
-        totals.append({
+    return [
+        {
             "route_id": r_idx,
             "n_stops": n_stops,
             "total_dist_km": dist_sum_m / 1000.0,
@@ -68,6 +67,7 @@ def compute_route_totals(
             "total_wait_min": wait_sum,
             "total_service_min": service_sum,
             "total_time_min": drive_sum + wait_sum + service_sum,
-        })
-
-    return totals
+        }
+        for (r_idx, _), drive_sum, wait_sum, service_sum, dist_sum_m, n_stops
+        in zip(kept, drive_sums, wait_sums, service_sums, dist_sums, stop_counts)
+    ]
@@ -1,10 +1,26 @@
 from __future__ import annotations
 
-from datetime import datetime, date, time, timedelta
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from datetime import date
+from itertools import product
+from time import monotonic
+
+import numpy as np
 from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 
 from .config import SolveConfig
-from .io_excel import depot_union_windows
+from .io_excel import depot_union_windows, node_tw_array
+from .matrix import as_matrix
+
+# Kombinationen für parallele Suchläufe (search_workers > 1), konfigurierte zuerst
+_PORTFOLIO_STRATEGIES = ("PARALLEL_CHEAPEST_INSERTION", "SAVINGS", "PATH_CHEAPEST_ARC", "LOCAL_CHEAPEST_INSERTION")
+_PORTFOLIO_METAHEURISTICS = ("GUIDED_LOCAL_SEARCH", "TABU_SEARCH", "SIMULATED_ANNEALING")
+
+# Zeithorizont: CumulVar der Time-Dimension = Minuten seit 00:00
+_HORIZON_MIN = 24 * 60
 
 
 def restrict_intvar_to_union(intvar, windows: list[tuple[int, int]]):
@@ -24,68 +40,250 @@ def restrict_intvar_to_union(intvar, windows: list[tuple[int, int]]):
             intvar.RemoveInterval(gap_start, gap_end)
 
 
-def _pseudo_wait_from_timewindow(
-        node: int,
-        arrival_min: int,
-        node_time_windows: list[tuple[int, int] | None],
-) -> int:
+def _tw_start_minutes(node_time_windows: list[tuple[int, int] | None]) -> list[int]:
     """
+    Fensterbeginn je Node für die Pseudo-Wartezeit, einmal je Lösung statt je Stopp nachgeschlagen.
+
     Robust gegen OR-Tools SlackVar-Probleme (Python 3.13):
     Wir berechnen eine 'Wartezeit' als:
       wait = max(0, TW_start - arrival_time)
     Das entspricht dem klassischen 'zu früh angekommen, muss warten bis Fenster öffnet'.
+    Depot und Nodes ohne Fenster bekommen -1 → Wartezeit immer 0.
 
     Achtung:
     - Das ist NICHT exakt die interne SlackVar des Solvers (der kann Warten auch anders verteilen),
       aber es ist für Debug & Output meistens das, was man fachlich sehen will.
     """
-    if node == 0:
-        return 0
-    tw = node_time_windows[node]
-    if tw is None:
-        return 0
-    tw_start, _tw_end = tw
-    return max(0, tw_start - arrival_min)
+    tw_starts = node_tw_array(node_time_windows)[:, 0].tolist()
+    tw_starts[0] = -1
+    return tw_starts
 
 
-def solve_vrptw(
-        depot,
-        solve_cfg: SolveConfig,
-        time_matrix_min: list[list[int]],
+def _transit_matrix(
+        time_matrix_min: np.ndarray,
+        service_mins: np.ndarray,
+) -> list[list[int]]:
+    """
+    Transitzeit je Node-Paar: Fahrzeit + Servicezeit am Zielknoten (Depot ohne Service).
+    Wird als Ganzes an OR-Tools übergeben (RegisterTransitMatrix), damit die Suche
+    nicht für jede Kante in einen Python-Callback springen muss.
+    """
+    tm = as_matrix(time_matrix_min)
+    service_to = service_mins[:len(tm)].copy()
+    service_to[0] = 0
+    return (tm + service_to).tolist()
+
+
+def _model_parameters():
+    """
+    Modellparameter beider Solver. Alle Fahrzeuge teilen Kostenfunktion (transit_idx) und
+    Depotfenster → reduce_vehicle_cost_model fasst sie zu einer Kostenklasse zusammen.
+    Das ist OR-Tools-Default, wird hier aber bewusst festgeschrieben.
+    """
+    model_params = pywrapcp.DefaultRoutingModelParameters()
+    model_params.reduce_vehicle_cost_model = True
+    return model_params
+
+
+def _search_parameters(solve_cfg: SolveConfig, time_limit_s: int):
+    """
+    Suchparameter beider Solver. Startheuristik aus solve_cfg (Default: Insertion – liefert
+    bei Zeitfenstern bessere Startlösungen als PATH_CHEAPEST_ARC), danach die Metaheuristik
+    aus solve_cfg (Default: Guided Local Search).
+    """
+    try:
+        strategy = routing_enums_pb2.FirstSolutionStrategy.Value.Value(solve_cfg.first_solution_strategy)
+    except ValueError:
+        raise ValueError(f"Unbekannte Startheuristik: {solve_cfg.first_solution_strategy}") from None
+    try:
+        metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.Value.Value(solve_cfg.local_search_metaheuristic)
+    except ValueError:
+        raise ValueError(f"Unbekannte Metaheuristik: {solve_cfg.local_search_metaheuristic}") from None
+
+    params = pywrapcp.DefaultRoutingSearchParameters()
+    params.first_solution_strategy = strategy
+    params.local_search_metaheuristic = metaheuristic
+    params.time_limit.FromSeconds(time_limit_s)
+    return params
+
+
+def _stop_on_stall(routing, stall_limit_s: int) -> None:
+    """
+    Beendet die Suche, sobald sich die beste Lösung `stall_limit_s` Sekunden lang nicht
+    verbessert hat. GLS meldet laufend (auch schlechtere) Lösungen – der Callback prüft
+    dabei nur Kosten und Uhr, das Zeitlimit bleibt die Obergrenze.
+    """
+    if stall_limit_s <= 0:
+        return
+
+    # CostVar existiert erst nach dem Schließen des Modells (CloseModelWithParameters)
+    finish   = routing.solver().FinishCurrentSearch
+    cost_var = routing.CostVar()
+    best     = [None, monotonic()]  # [beste Kosten, Zeitpunkt der letzten Verbesserung]
+
+    def on_solution():
+        cost = cost_var.Value()
+        now  = monotonic()
+        if best[0] is None or cost < best[0]:
+            best[0], best[1] = cost, now
+        elif now - best[1] > stall_limit_s:
+            finish()
+
+    routing.AddAtSolutionCallback(on_solution)
+
+
+def _read_initial_assignment(routing, initial_routes, n_locations: int, num_vehicles: int):
+    """
+    Startlösung aus Node-Listen (Modell muss geschlossen sein). None, wenn keine gegeben
+    oder sie nicht zum Modell passt (mehr Routen als Fahrzeuge, unbekannte Nodes,
+    verletzte Zeitfenster).
+    """
+    if not initial_routes or len(initial_routes) > num_vehicles:
+        return None
+    if any(not 0 < node < n_locations for route in initial_routes for node in route):
+        return None
+
+    return routing.ReadAssignmentFromRoutes([list(route) for route in initial_routes], True)
+
+
+def _extract_routes(
+        routing,
+        manager,
+        solution,
+        time_dim,
+        num_vehicles: int,
+        time_matrix_min: np.ndarray,
         node_time_windows: list[tuple[int, int] | None],
-        node_service_mins: list[int],
-):
+        service_mins: np.ndarray,
+) -> list[list[tuple[int, int, int]]]:
     """
-    Pflichtbedienung:
-      - Alle Kunden-Nodes (Index >=1) sind obligatorisch. Kein Drop.
-      - Jeder Node hat genau 1 Zeitfenster.
+    Extraktion: je benutzter Route [(node, arrival_time_min, pseudo_wait_min), ...].
+    Die OR-Tools-Methoden werden einmal als lokale Namen gebunden – in der Schleife
+    fällt dann je Schritt nur noch der Aufruf über die pybind-Grenze an.
+    """
+    value     = solution.Value
+    next_var  = routing.NextVar
+    is_end    = routing.IsEnd
+    cumul_var = time_dim.CumulVar
+    to_node   = manager.IndexToNode
+    tw_starts = _tw_start_minutes(node_time_windows)
 
-    Depot / Labor (WICHTIG: neue Anforderung):
-      - Fahrzeuge dürfen jederzeit starten (Start-Zeit frei).
-      - Sie müssen nur innerhalb der Depot-Öffnungszeiten ANKOMMEN (Ende in UNION der Depotfenster).
-      => wir setzen Depotfenster nur auf routing.End(v), NICHT auf routing.Start(v).
+    routes = []
+    for v in range(num_vehicles):
+        idx = routing.Start(v)
+        if is_end(value(next_var(idx))):
+            continue
+
+        # Erst die Indexfolge ablaufen, dann Nodes und Zeiten je in einer Comprehension
+        indices = [idx]
+        while not is_end(idx):
+            idx = value(next_var(idx))
+            indices.append(idx)
+        nodes = [to_node(i) for i in indices]
+        tmins = [value(cumul_var(i)) for i in indices]
+
+        # Fix: Depot-Startzeit korrigieren.
+        # Der Solver setzt CumulVar(Start) oft auf 0, weil der Start-Zeitpunkt
+        # keine Kostenwirkung hat. Wir berechnen die echte Abfahrtszeit aus dem
+        # ersten Kundenstopp zurück: Ankunft_Kunde − Fahrzeit − Servicezeit –
+        # direkt beim Aufbau, statt den Depot-Eintrag nachträglich zu ersetzen.
+        first_node = nodes[1]
+        travel     = int(time_matrix_min[0, first_node])
+        departure  = max(0, tmins[1] - travel - int(service_mins[first_node]))
+
+        # Startknoten (Depot, ohne Wartezeit)
+        route = [(nodes[0], departure, 0)]
+        route += [
+            (node, tmin, max(0, tw_starts[node] - tmin))
+            for node, tmin in zip(nodes[1:-1], tmins[1:-1])
+        ]
+        # Endknoten (Depot)
+        route.append((nodes[-1], tmins[-1], 0))
+
+        routes.append(route)
+
+    return routes
+
+
+def _portfolio_variants(solve_cfg: SolveConfig) -> list[SolveConfig]:
     """
-    n_locations = len(node_time_windows)
-    if n_locations != len(time_matrix_min):
-        raise ValueError("Matrixgröße passt nicht zur Node-Liste.")
+    Je Suchlauf eine Konfiguration: zuerst die konfigurierte Kombination, dann die übrigen
+    Startheuristik×Metaheuristik-Paare – so viele wie search_workers, höchstens eine je
+    CPU-Kern (mehr Prozesse teilen sich sonst die Kerne und damit das Zeitlimit).
+    """
+    configured = (solve_cfg.first_solution_strategy, solve_cfg.local_search_metaheuristic)
+    pairs = [configured] + [
+        pair for pair in product(_PORTFOLIO_STRATEGIES, _PORTFOLIO_METAHEURISTICS) if pair != configured
+    ]
+    return [
+        replace(solve_cfg, first_solution_strategy=strategy, local_search_metaheuristic=metaheuristic,
+                search_workers=1)
+        for strategy, metaheuristic in pairs[:min(solve_cfg.search_workers, os.cpu_count() or 1)]
+    ]
+
+
+def _solve_variant(depot, solve_cfg, time_matrix_min, node_time_windows, node_service_mins, initial_routes):
+    """
+    Ein Suchlauf im Worker-Prozess (OR-Tools-Modelle sind nicht picklebar → je Prozess neu).
+    Nur "keine Lösung" wird zu None, andere Fehler (z.B. fehlende Zeitfenster) gehen durch.
+    """
+    try:
+        return solve_vrptw(depot, solve_cfg, time_matrix_min, node_time_windows, node_service_mins,
+                           initial_routes=initial_routes)
+    except RuntimeError as exc:
+        if str(exc) != "INFEASIBLE":
+            raise
+        return None
 
-    num_vehicles = max(1, solve_cfg.num_vehicles)
 
-    manager = pywrapcp.RoutingIndexManager(n_locations, num_vehicles, 0)
-    routing = pywrapcp.RoutingModel(manager)
+def _solve_portfolio(depot, solve_cfg, time_matrix_min, node_time_windows, node_service_mins, initial_routes):
+    """
+    Parallele Suchläufe mit verschiedenen Kombinationen, Ergebnis mit den geringsten Kosten.
+    Bei Gleichstand gewinnt die konfigurierte Kombination (erste Variante).
+    """
+    variants = _portfolio_variants(solve_cfg)
+    if len(variants) == 1:
+        return solve_vrptw(depot, variants[0], time_matrix_min, node_time_windows, node_service_mins,
+                           initial_routes=initial_routes)
+
+    # "spawn" statt fork: der Aufrufer (Streamlit-Server) ist multithreaded, ein Fork
+    # kann dort gehaltene Locks in den Kindprozess kopieren und hängen bleiben
+    with ProcessPoolExecutor(max_workers=len(variants), mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [
+            executor.submit(_solve_variant, depot, cfg, time_matrix_min, node_time_windows, node_service_mins,
+                            initial_routes)
+            for cfg in variants
+        ]
+        results = [f.result() for f in futures]
+
+    feasible = [r for r in results if r is not None]
+    if not feasible:
+        raise RuntimeError("INFEASIBLE")
+    return min(feasible, key=lambda r: r["objective"])
 
-    # Transitzeit = Fahrzeit + Servicezeit am Zielknoten
-    def time_cb(from_index: int, to_index: int) -> int:
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        travel = time_matrix_min[from_node][to_node]
-        service = node_service_mins[to_node] if to_node != 0 else 0
-        return travel + service
 
-    transit_idx = routing.RegisterTransitCallback(time_cb)
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_idx)
+def _build_model(
+        depot,
+        solve_cfg: SolveConfig,
+        time_matrix_min: np.ndarray,
+        service_mins: np.ndarray,
+        n_locations: int,
+        num_vehicles: int,
+):
+    """
+    Gemeinsamer Modellaufbau beider Solver: Transitmatrix, Time-/Duration-Dimension,
+    freier Start und Depot-Union fürs Ende. Kundenzeitfenster setzt der jeweilige Solver
+    (hart bzw. soft).
 
-    horizon = 24 * 60
+    Rückgabe: (manager, routing, time_dim, node_to_index, depot_windows)
+    """
+    manager = pywrapcp.RoutingIndexManager(n_locations, num_vehicles, 0)
+    routing = pywrapcp.RoutingModel(manager, _model_parameters())
+    node_to_index = [manager.NodeToIndex(node) for node in range(n_locations)]  # einmal statt je Schleife
+
+    # Transitzeit = Fahrzeit + Servicezeit am Zielknoten (komplett in C++, kein Python-Callback)
+    transit_idx = routing.RegisterTransitMatrix(_transit_matrix(time_matrix_min, service_mins))
+    routing.SetArcCostEvaluatorOfAllVehicles(transit_idx)
 
     # "Time"-Dimension: absoluter Taktgeber (Minuten seit 00:00).
     # capacity MUSS 24*60 sein – capacity ist der maximale absolute CumulVar-Wert,
@@ -94,15 +292,16 @@ def solve_vrptw(
     routing.AddDimension(
         transit_idx,
         solve_cfg.max_wait_min,  # maximale Wartezeit (slack) insgesamt
-        horizon,                 # Kapazität = voller Zeithorizont (CumulVar = absolute Uhrzeit)
+        _HORIZON_MIN,            # Kapazität = voller Zeithorizont (CumulVar = absolute Uhrzeit)
         False,
         "Time",
     )
     time_dim = routing.GetDimensionOrDie("Time")
 
     # "Duration"-Dimension: misst die reine Tourdauer ab Abfahrt (fix_start=True → startet bei 0).
-    # Über capacity wird die Maximaldauer hart begrenzt.
-    if solve_cfg.max_route_duration_min > 0:
+    # Über capacity wird die Maximaldauer hart begrenzt. Ab einem vollen Tag ist sie
+    # redundant: die Time-Dimension hält jede Tour ohnehin innerhalb von 24 h.
+    if 0 < solve_cfg.max_route_duration_min < _HORIZON_MIN:
         routing.AddDimension(
             transit_idx,
             solve_cfg.max_wait_min,
@@ -116,77 +315,97 @@ def solve_vrptw(
 
     for v in range(num_vehicles):
         # Start frei (kann sehr früh sein, falls nötig)
-        time_dim.CumulVar(routing.Start(v)).SetRange(0, horizon)
+        time_dim.CumulVar(routing.Start(v)).SetRange(0, _HORIZON_MIN)
 
         # Ende muss in Depot-Union liegen
         restrict_intvar_to_union(time_dim.CumulVar(routing.End(v)), depot_windows)
 
+    return manager, routing, time_dim, node_to_index, depot_windows
+
+
+def solve_vrptw(
+        depot,
+        solve_cfg: SolveConfig,
+        time_matrix_min: np.ndarray,
+        node_time_windows: list[tuple[int, int] | None],
+        node_service_mins: list[int],
+        initial_routes: list[list[int]] | None = None,
+):
+    """
+    Pflichtbedienung:
+      - Alle Kunden-Nodes (Index >=1) sind obligatorisch. Kein Drop.
+      - Jeder Node hat genau 1 Zeitfenster.
+
+    Depot / Labor (WICHTIG: neue Anforderung):
+      - Fahrzeuge dürfen jederzeit starten (Start-Zeit frei).
+      - Sie müssen nur innerhalb der Depot-Öffnungszeiten ANKOMMEN (Ende in UNION der Depotfenster).
+      => wir setzen Depotfenster nur auf routing.End(v), NICHT auf routing.Start(v).
+
+    Warmstart: `initial_routes` (Kunden-Nodes je Route, ohne Depot – z.B. "node_routes"
+    eines vorherigen Laufs) dient als Startlösung. Passt sie nicht (mehr), wird normal
+    von vorn gesucht.
+
+    Mit search_workers > 1 laufen mehrere Suchen parallel (siehe _solve_portfolio).
+    """
+    # Matrix und Servicezeiten einmal als zusammenhängende Arrays – alles Weitere arbeitet darauf
+    time_matrix_min = as_matrix(time_matrix_min)
+    service_mins    = np.asarray(node_service_mins, dtype=np.int64)
+    n_locations     = len(node_time_windows)
+    if n_locations != len(time_matrix_min):
+        raise ValueError("Matrixgröße passt nicht zur Node-Liste.")
+
+    if solve_cfg.search_workers > 1:
+        return _solve_portfolio(depot, solve_cfg, time_matrix_min, node_time_windows, service_mins,
+                                initial_routes)
+
+    num_vehicles = max(1, solve_cfg.num_vehicles)
+
+    manager, routing, time_dim, node_to_index, depot_windows = _build_model(
+        depot, solve_cfg, time_matrix_min, service_mins, n_locations, num_vehicles,
+    )
+
     # Kundenzeitfenster: harte Constraints
     for node in range(1, n_locations):
         tw = node_time_windows[node]
         if tw is None:
             raise RuntimeError("Kundennode ohne Zeitfenster gefunden.")
-        idx = manager.NodeToIndex(node)
-        time_dim.CumulVar(idx).SetRange(tw[0], tw[1])
+        time_dim.CumulVar(node_to_index[node]).SetRange(tw[0], tw[1])
 
     # Optional: reduziert oft „unnötig frühe" Starts (minimiert Spannweite der Touren)
     # time_dim.SetGlobalSpanCostCoefficient(1)
 
     # Suchparameter
-    params = pywrapcp.DefaultRoutingSearchParameters()
-    params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    params.time_limit.FromSeconds(30)
-
-    solution = routing.SolveWithParameters(params)
+    # Modell explizit schließen: Kostenklassen stehen vor Warmstart und Suche fest
+    params = _search_parameters(solve_cfg, time_limit_s=30)
+    routing.CloseModelWithParameters(params)
+    _stop_on_stall(routing, solve_cfg.stall_limit_s)
+
+    initial = _read_initial_assignment(routing, initial_routes, n_locations, num_vehicles)
+    if initial is not None:
+        # GLS startet in der Nachbarschaft der bekannten Lösung statt bei der Startheuristik
+        solution = routing.SolveFromAssignmentWithParameters(initial, params)
+    else:
+        solution = routing.SolveWithParameters(params)
     if solution is None:
         raise RuntimeError("INFEASIBLE")
 
-    # Extraktion: (node, arrival_time_min, pseudo_wait_min)
-    routes = []
-    for v in range(num_vehicles):
-        idx = routing.Start(v)
-        nxt = solution.Value(routing.NextVar(idx))
-        if routing.IsEnd(nxt):
-            continue
-
-        route = []
-        while not routing.IsEnd(idx):
-            node = manager.IndexToNode(idx)
-            tmin = solution.Value(time_dim.CumulVar(idx))
-            pseudo_wait = _pseudo_wait_from_timewindow(node, tmin, node_time_windows)
-            route.append((node, tmin, pseudo_wait))
-            idx = solution.Value(routing.NextVar(idx))
-
-        # Endknoten (Depot)
-        node = manager.IndexToNode(idx)
-        tmin = solution.Value(time_dim.CumulVar(idx))
-        route.append((node, tmin, 0))
-
-        # Fix: Depot-Startzeit korrigieren.
-        # Der Solver setzt CumulVar(Start) oft auf 0, weil der Start-Zeitpunkt
-        # keine Kostenwirkung hat. Wir berechnen die echte Abfahrtszeit aus dem
-        # ersten Kundenstopp zurück: Ankunft_Kunde − Fahrzeit − Servicezeit.
-        if len(route) >= 2:
-            first_node = route[1][0]
-            first_tmin = route[1][1]
-            travel     = time_matrix_min[0][first_node]
-            service    = node_service_mins[first_node]
-            departure  = max(0, first_tmin - travel - service)
-            route[0]   = (route[0][0], departure, route[0][2])
-
-        routes.append(route)
+    routes = _extract_routes(
+        routing, manager, solution, time_dim, num_vehicles,
+        time_matrix_min, node_time_windows, service_mins,
+    )
 
     return {
         "routes": routes,
+        "node_routes": [[step[0] for step in route[1:-1]] for route in routes],
         "depot_windows": depot_windows,
+        "objective": solution.ObjectiveValue(),
     }
 
 
 def solve_vrptw_relaxed_soft_timewindows(
         depot,
         solve_cfg: SolveConfig,
-        time_matrix_min: list[list[int]],
+        time_matrix_min: np.ndarray,
         node_time_windows: list[tuple[int, int] | None],
         node_service_mins: list[int],
         soft_penalty_per_min: int = 1000,
@@ -197,118 +416,70 @@ def solve_vrptw_relaxed_soft_timewindows(
     - Depot-Ende bleibt hart innerhalb der Depot-Union (Einlieferung muss in Öffnungszeit passieren).
     - Start bleibt frei.
     """
-    n_locations = len(node_time_windows)
+    # Matrix und Servicezeiten einmal als zusammenhängende Arrays – alles Weitere arbeitet darauf
+    time_matrix_min = as_matrix(time_matrix_min)
+    service_mins    = np.asarray(node_service_mins, dtype=np.int64)
+    n_locations     = len(node_time_windows)
     num_vehicles = max(1, solve_cfg.num_vehicles)
 
-    manager = pywrapcp.RoutingIndexManager(n_locations, num_vehicles, 0)
-    routing = pywrapcp.RoutingModel(manager)
-
-    def time_cb(from_index: int, to_index: int) -> int:
-        from_node = manager.IndexToNode(from_index)
-        to_node = manager.IndexToNode(to_index)
-        travel = time_matrix_min[from_node][to_node]
-        service = node_service_mins[to_node] if to_node != 0 else 0
-        return travel + service
-
-    transit_idx = routing.RegisterTransitCallback(time_cb)
-    routing.SetArcCostEvaluatorOfAllVehicles(transit_idx)
-
-    horizon = 24 * 60
-
-    routing.AddDimension(
-        transit_idx,
-        solve_cfg.max_wait_min,
-        horizon,                 # Kapazität = voller Zeithorizont (CumulVar = absolute Uhrzeit)
-        False,
-        "Time",
+    manager, routing, time_dim, node_to_index, depot_windows = _build_model(
+        depot, solve_cfg, time_matrix_min, service_mins, n_locations, num_vehicles,
     )
-    time_dim = routing.GetDimensionOrDie("Time")
-
-    if solve_cfg.max_route_duration_min > 0:
-        routing.AddDimension(
-            transit_idx,
-            solve_cfg.max_wait_min,
-            solve_cfg.max_route_duration_min,
-            True,
-            "Duration",
-        )
-
-    # Depot-Ende hart in Union, Start frei
-    depot_windows = depot_union_windows(depot, solve_cfg)
-    for v in range(num_vehicles):
-        time_dim.CumulVar(routing.Start(v)).SetRange(0, horizon)
-        restrict_intvar_to_union(time_dim.CumulVar(routing.End(v)), depot_windows)
 
     # Kunden-TWs soft: großer Range + SoftBounds
     for node in range(1, n_locations):
         tw = node_time_windows[node]
         if tw is None:
             raise RuntimeError("Kundennode ohne Zeitfenster gefunden.")
-        idx = manager.NodeToIndex(node)
+        idx = node_to_index[node]
 
-        time_dim.CumulVar(idx).SetRange(0, horizon)
+        time_dim.CumulVar(idx).SetRange(0, _HORIZON_MIN)
 
         s, e = tw
         time_dim.SetCumulVarSoftLowerBound(idx, s, soft_penalty_per_min)
         time_dim.SetCumulVarSoftUpperBound(idx, e, soft_penalty_per_min)
 
-    params = pywrapcp.DefaultRoutingSearchParameters()
-    params.first_solution_strategy = routing_enums_pb2.FirstSolutionStrategy.PATH_CHEAPEST_ARC
-    params.local_search_metaheuristic = routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
-    params.time_limit.FromSeconds(10)
+    params = _search_parameters(solve_cfg, time_limit_s=10)
+    routing.CloseModelWithParameters(params)
+    _stop_on_stall(routing, solve_cfg.stall_limit_s)
 
     sol = routing.SolveWithParameters(params)
     if sol is None:
         return None
 
-    # Extraktion: (node, arrival_time_min, pseudo_wait_min)
-    routes = []
-    for v in range(num_vehicles):
-        idx = routing.Start(v)
-        nxt = sol.Value(routing.NextVar(idx))
-        if routing.IsEnd(nxt):
-            continue
-
-        route = []
-        while not routing.IsEnd(idx):
-            node = manager.IndexToNode(idx)
-            tmin = sol.Value(time_dim.CumulVar(idx))
-            pseudo_wait = _pseudo_wait_from_timewindow(node, tmin, node_time_windows)
-            route.append((node, tmin, pseudo_wait))
-            idx = sol.Value(routing.NextVar(idx))
-
-        node = manager.IndexToNode(idx)
-        tmin = sol.Value(time_dim.CumulVar(idx))
-        route.append((node, tmin, 0))
-
-        # Fix: Depot-Startzeit korrigieren (gleiche Logik wie solve_vrptw)
-        if len(route) >= 2:
-            first_node = route[1][0]
-            first_tmin = route[1][1]
-            travel     = time_matrix_min[0][first_node]
-            service    = node_service_mins[first_node]
-            departure  = max(0, first_tmin - travel - service)
-            route[0]   = (route[0][0], departure, route[0][2])
+    routes = _extract_routes(
+        routing, manager, sol, time_dim, num_vehicles,
+        time_matrix_min, node_time_windows, service_mins,
+    )
 
-        routes.append(route)
+    # Verletzungen reporten (gegen Original-TWs): Zeiten einmal auslesen, Rest vektorisiert
+    value, cumul_var = sol.Value, time_dim.CumulVar
+    tmin_arr = np.fromiter(
+        (value(cumul_var(idx)) for idx in node_to_index[1:]),
+        dtype=np.int64, count=n_locations - 1,
+    )
+    tws_arr = node_tw_array(node_time_windows)[1:].astype(np.int64)
+    early   = np.maximum(0, tws_arr[:, 0] - tmin_arr)
+    late    = np.maximum(0, tmin_arr - tws_arr[:, 1])
+
+    # Sortierung wie zuvor: late, dann early absteigend; Gleichstand nach Node-Nummer
+    hits  = np.flatnonzero((early > 0) | (late > 0))
+    order = hits[np.lexsort((hits, -early[hits], -late[hits]))]
+    violations = [
+        {"node": node, "time_min": tmin, "early_min": early_min, "late_min": late_min, "tw": (tw_s, tw_e)}
+        for node, tmin, early_min, late_min, (tw_s, tw_e) in zip(
+            (order + 1).tolist(), tmin_arr[order].tolist(), early[order].tolist(),
+            late[order].tolist(), tws_arr[order].tolist(),
+        )
+    ]
 
-    # Verletzungen reporten (gegen Original-TWs)
-    violations = []
-    for node in range(1, n_locations):
-        idx = manager.NodeToIndex(node)
-        tmin = sol.Value(time_dim.CumulVar(idx))
-        s, e = node_time_windows[node]
-        early = max(0, s - tmin)
-        late = max(0, tmin - e)
-        if early or late:
-            violations.append(
-                {"node": node, "time_min": tmin, "early_min": early, "late_min": late, "tw": (s, e)}
-            )
-
-    violations.sort(key=lambda x: (x["late_min"], x["early_min"]), reverse=True)
     return {"routes": routes, "violations": violations, "depot_windows": depot_windows}
 
 
 def fmt_min_to_hhmm(day: date, mins: int) -> str:
-    dt = datetime.combine(day, time(0, 0)) + timedelta(minutes=mins)
-    return dt.strftime("%H:%M")
+    """
+    Minuten seit 00:00 als "HH:MM" (über Mitternacht hinaus modulo 24 h, wie Uhrzeit am Folgetag).
+    `day` bleibt für bestehende Aufrufer in der Signatur, die Uhrzeit hängt nicht davon ab.
+    """
+    hours, minutes = divmod(mins % _HORIZON_MIN, 60)
+    return f"{hours:02d}:{minutes:02d}"